@@ -2,39 +2,45 @@
 from __future__ import annotations
 
 import asyncio
+import itertools
 from collections.abc import Iterable
+from contextlib import aclosing
 from http import HTTPStatus
+from typing import Any
 import importlib
 import logging
+from time import monotonic
 import homeassistant
 
 from aiohttp.client_exceptions import ClientConnectionError, ClientResponseError
-from .pysmartapp.event import EVENT_TYPE_DEVICE
-from .pysmartthings import Attribute, Capability, SmartThings
+from .pysmartapp.event import DeviceEvent
+from .pysmartthings import Attribute, Capability, SmartThings, bind_rate_limiter, get_rate_limiter
+from .pysmartthings.api import Api
 
 from homeassistant.config_entries import SOURCE_IMPORT, ConfigEntry
-from homeassistant.const import CONF_ACCESS_TOKEN, CONF_CLIENT_ID, CONF_CLIENT_SECRET, SERVICE_RELOAD
-from homeassistant.core import HomeAssistant
+from homeassistant.const import CONF_ACCESS_TOKEN, CONF_CLIENT_ID, CONF_CLIENT_SECRET, SERVICE_RELOAD, EVENT_HOMEASSISTANT_STOP
+from homeassistant.core import HomeAssistant, callback
 from homeassistant.exceptions import ConfigEntryNotReady
 from homeassistant.helpers import config_validation as cv
-from homeassistant.helpers.aiohttp_client import async_get_clientsession
 from homeassistant.helpers.dispatcher import (
     async_dispatcher_connect,
     async_dispatcher_send,
 )
 from homeassistant.helpers.entity import DeviceInfo, Entity
-from homeassistant.helpers.event import async_track_time_interval
+from homeassistant.helpers.event import async_call_later, async_track_time_interval
+from homeassistant.helpers.service import async_register_admin_service
+from homeassistant.helpers.storage import Store
 from homeassistant.helpers.typing import ConfigType
 from homeassistant.helpers.entity import async_generate_entity_id
 from homeassistant.loader import async_get_loaded_integration
 from homeassistant.setup import SetupPhases, async_pause_setup
 
 from .common import *
-from .device import SmartThings_custom
+from .device import SmartThings_custom, location_to_data, scene_to_data
 
 from homeassistant import config_entries, core
 
-from .custom_api import async_get_app_info, async_remove_app_info
+from .custom_api import async_get_app_info, async_get_session, async_remove_app_info, get_session_stats
 
 import yaml
 
@@ -49,6 +55,7 @@ from .smartapp import (
     validate_installed_app,
     validate_webhook_requirements,
 )
+from .poller import DevicePoller
 
 from homeassistant.helpers import (
     device_registry as dr,
@@ -68,30 +75,16 @@ async def async_setup(hass: HomeAssistant, config: ConfigType) -> bool:
     """Initialize the SmartThings platform."""
     await setup_smartapp_endpoint(hass, False)
 
-    # async def _handle_reload(service):
-    #     """Handle reload service call."""
-
-    #     current_entries = hass.config_entries.async_entries(DOMAIN)
-
-    #     reload_tasks = [
-    #         hass.config_entries.async_reload(entry.entry_id)
-    #         for entry in current_entries
-    #     ]
-
-    #     await asyncio.gather(*reload_tasks)
-
-        # entries = hass.config_entries.async_entries(DOMAIN)
-        # for entry in entries:
-        #     _LOGGER.error("_handle_reload entry id : " + str(entry.entry_id))
-        #     config_entry = hass.config_entries.async_get_entry(entry.entry_id)
-        #     _LOGGER.error("config entry : " + str(config_entry))
-        #     await update_listener(hass, config_entry)
+    async def _handle_reload(service):
+        """Reload the yaml settings of every location without a cloud resync."""
+        await asyncio.gather(
+            *(
+                broker.async_reload_settings()
+                for broker in list(hass.data[DOMAIN][DATA_BROKERS].values())
+            )
+        )
 
-    # hass.helpers.service.async_register_admin_service(
-    #     DOMAIN,
-    #     SERVICE_RELOAD,
-    #     _handle_reload,
-    # )
+    async_register_admin_service(hass, DOMAIN, SERVICE_RELOAD, _handle_reload)
 
     return True
 
@@ -136,7 +129,9 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
         )
         return False
 
-    api = SmartThings_custom(async_get_clientsession(hass), entry.data[CONF_ACCESS_TOKEN])
+    # The requests of the entry share one limiter, whatever token they use
+    bind_rate_limiter(entry.data[CONF_ACCESS_TOKEN], entry.data[CONF_INSTALLED_APP_ID])
+    api = SmartThings_custom(await async_get_session(hass), entry.data[CONF_ACCESS_TOKEN])
 
     # Ensure platform modules are loaded since the DeviceBroker will
     # import them below and we want them to be cached ahead of time
@@ -144,26 +139,59 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     # to import the modules.
     await async_get_loaded_integration(hass, DOMAIN).async_get_platforms(PLATFORMS)
 
-    settings = SettingManager()
-    settings.init(hass, await api.location(entry.data[CONF_LOCATION_ID]))
-    await hass.async_add_executor_job(settings.load_setting)
-    SettingManager().set_options(entry.options)
+    # Warm start: the entities are created from the last snapshot and
+    # brought up to date with the cloud in the background.
+    snapshot = await async_load_snapshot(hass, entry)
+
+    # Calls that do not depend on each other are run concurrently:
+    #   location, app, token -> installed app, scenes, devices
+    #   -> status, subscriptions
+    timings = {}
+
+    async def get_location():
+        if snapshot:
+            return api.restore_location(snapshot["location"])
+        return await api.location(entry.data[CONF_LOCATION_ID])
+
+    async def load_settings():
+        # Each config entry (location) has its own settings
+        settings = SettingManager(hass, await _timed(timings, "location", get_location()))
+        await _timed(timings, "settings", hass.async_add_executor_job(settings.load_setting))
+        # Time spent in the yaml parser, 0 when the compiled settings were cached
+        timings["settings_parse"] = settings.parse_time
+        settings.set_options(entry.options)
+        return settings
+
+    async def get_app():
+        app = await async_get_app_info(hass, entry.data[CONF_APP_ID], entry.data[CONF_ACCESS_TOKEN])
+
+        if app is None:
+            try:
+                app = await api.app(entry.data[CONF_APP_ID])
+            except ClientResponseError as ex:
+                _LOGGER.exception("Failed to fetch app from API. status=%s", getattr(ex, "status", None))
+                raise ConfigEntryNotReady from ex
+
+        if app is None:
+            _LOGGER.error("Unable to load SmartApp info (app is None). app_id=%s", entry.data[CONF_APP_ID])
+            raise ConfigEntryNotReady
+        return app
+
+    async def get_token():
+        if snapshot:
+            return None
+        # Get SmartApp token to sync subscriptions
+        return await async_rotate_token(hass, entry, api)
 
     remove_entry = False
-    app = await async_get_app_info(hass, entry.data[CONF_APP_ID], entry.data[CONF_ACCESS_TOKEN])
-
-    if app is None:
-        try:
-            app = await api.app(entry.data[CONF_APP_ID])
-        except ClientResponseError as ex:
-            _LOGGER.exception("Failed to fetch app from API. status=%s", getattr(ex, "status", None))
-            raise ConfigEntryNotReady from ex
-
-    if app is None:
-        _LOGGER.error("Unable to load SmartApp info (app is None). app_id=%s", entry.data[CONF_APP_ID])
-        raise ConfigEntryNotReady
-
+    setup_start = monotonic()
     try:
+        settings, app, token = await asyncio.gather(
+            load_settings(),
+            _timed(timings, "app", get_app()),
+            _timed(timings, "token", get_token()),
+        )
+
         # See if the app is already setup. This occurs when there are
         # installs in multiple SmartThings locations (valid use-case)
         manager = hass.data[DOMAIN][DATA_MANAGER]
@@ -173,57 +201,25 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
             #app = await api.app(entry.data[CONF_APP_ID])
             smart_app = setup_smartapp(hass, app)
 
-        # Validate and retrieve the installed app.
-        installed_app = await validate_installed_app(
-            api, entry.data[CONF_INSTALLED_APP_ID]
-        )
-
-        # Get scenes
-        scenes = await async_get_entry_scenes(entry, api)
-        
-        # Get SmartApp token to sync subscriptions
-        token = await api.generate_tokens(
-            entry.data[CONF_CLIENT_ID],
-            entry.data[CONF_CLIENT_SECRET],
-            entry.data[CONF_REFRESH_TOKEN],
-        )
-        hass.config_entries.async_update_entry(
-            entry, data={**entry.data, 
-            CONF_ACCESS_TOKEN: token.access_token,
-            CONF_REFRESH_TOKEN: token.refresh_token
-            }
-        )
-
-        api = SmartThings_custom(async_get_clientsession(hass), token.access_token)
-
-        # Get devices and their current status
-        devices = await api.devices(location_ids=[installed_app.location_id])
-
-        async def retrieve_device_status(device):
-            try:
-                await device.status.refresh()
-            except ClientResponseError:
-                _LOGGER.debug(
-                    (
-                        "Unable to update status for device: %s (%s), the device will"
-                        " be excluded"
-                    ),
-                    device.label,
-                    device.device_id,
-                    exc_info=True,
-                )
-                devices.remove(device)
-
-        await asyncio.gather(*(retrieve_device_status(d) for d in devices.copy()))
-
-        # Sync device subscriptions
-        await smartapp_sync_subscriptions(
-            hass,
-            token.access_token,
-            installed_app.location_id,
-            installed_app.installed_app_id,
-            devices,
-        )
+        if snapshot:
+            scenes = api.restore_scenes(snapshot["scenes"])
+            devices = api.restore_devices(snapshot["devices"], snapshot["status"])
+            failed_devices = []
+        else:
+            api = SmartThings_custom(await async_get_session(hass), token.access_token)
+
+            # Validate and retrieve the installed app and get scenes. The
+            # devices are streamed to the broker once the platforms are set up
+            installed_app, scenes = await asyncio.gather(
+                _timed(
+                    timings,
+                    "installed_app",
+                    validate_installed_app(api, entry.data[CONF_INSTALLED_APP_ID]),
+                ),
+                _timed(timings, "scenes", async_get_entry_scenes(entry, api)),
+            )
+            devices = []
+            failed_devices = []
 
         # Setup device broker
         #broker = DeviceBroker(hass, entry, token, smart_app, devices, scenes)
@@ -232,11 +228,21 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
             # modules when its created. In the future this should be
             # refactored to not do this.
             broker = await hass.async_add_import_executor_job(
-                DeviceBroker, hass, entry, token, smart_app, devices, scenes
+                DeviceBroker, hass, entry, token, smart_app, devices, scenes, settings
             )
+        broker.retry_device_status(failed_devices)
         broker.connect()
         hass.data[DOMAIN][DATA_BROKERS][entry.entry_id] = broker
 
+        timings["total"] = monotonic() - setup_start
+        broker.setup_timings = timings
+        _LOGGER.debug(
+            "Setup of %s (%s start) took %s",
+            entry.title,
+            "warm" if snapshot else "cold",
+            ", ".join(f"{phase}: {elapsed:.2f}s" for phase, elapsed in timings.items()),
+        )
+
     except ClientResponseError as ex:
         if ex.status in (HTTPStatus.UNAUTHORIZED, HTTPStatus.FORBIDDEN):
             _LOGGER.exception(
@@ -265,7 +271,7 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
             )
         return False
 
-    if SettingManager.resetting_entities():
+    if settings.resetting_entities():
         entity_registry = homeassistant.helpers.entity_registry.async_get(
                 hass)
         entities = homeassistant.helpers.entity_registry.async_entries_for_config_entry(
@@ -282,6 +288,7 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     hass.config_entries.async_update_entry(
             entry,
             options={
+                    **entry.options,
                     #CONF_ENABLE_DEFAULT_ENTITIES:entry.options.get(CONF_ENABLE_DEFAULT_ENTITIES, False),
                     CONF_ENABLE_SYNTAX_PROPERTY:entry.options.get(CONF_ENABLE_SYNTAX_PROPERTY, False),
                     CONF_RESETTING_ENTITIES:False,
@@ -295,9 +302,20 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     entry.add_update_listener(update_listener)
 
     hass.data[DOMAIN]["listener"] = []
-    #PLATFORMS.different_update(SettingManager.ignore_platforms())
-    _LOGGER.debug("enable platforms : " + str(SettingManager().get_enable_platforms()))
-    await hass.config_entries.async_forward_entry_setups(entry, SettingManager().get_enable_platforms())
+    #PLATFORMS.different_update(settings.ignore_platforms())
+    _LOGGER.debug("enable platforms : " + str(settings.get_enable_platforms()))
+    await hass.config_entries.async_forward_entry_setups(entry, settings.get_enable_platforms())
+
+    if snapshot:
+        entry.async_create_background_task(
+            hass, broker.async_reconcile(), f"{DOMAIN}_reconcile_{entry.entry_id}"
+        )
+    else:
+        entry.async_create_background_task(
+            hass,
+            broker.async_stream_devices(api, installed_app),
+            f"{DOMAIN}_devices_{entry.entry_id}",
+        )
     return True
 
 async def update_listener(
@@ -308,6 +326,54 @@ async def update_listener(
     await hass.config_entries.async_reload(config_entry.entry_id)
 
 
+async def _timed(timings: dict, phase: str, awaitable):
+    """Await and record how long a setup phase took."""
+    start = monotonic()
+    try:
+        return await awaitable
+    finally:
+        timings[phase] = monotonic() - start
+
+
+async def async_rotate_token(hass: HomeAssistant, entry: ConfigEntry, api):
+    """Generate a new token and store it in the entry before anything else can fail."""
+    token = await api.generate_tokens(
+        entry.data[CONF_CLIENT_ID],
+        entry.data[CONF_CLIENT_SECRET],
+        entry.data[CONF_REFRESH_TOKEN],
+    )
+    bind_rate_limiter(token.access_token, entry.data[CONF_INSTALLED_APP_ID])
+    # 이전 refresh token은 이 시점에 무효화되므로 즉시 저장
+    hass.config_entries.async_update_entry(
+        entry,
+        data={
+            **entry.data,
+            CONF_ACCESS_TOKEN: token.access_token,
+            CONF_REFRESH_TOKEN: token.refresh_token,
+        },
+    )
+    return token
+
+
+def _snapshot_store(hass: HomeAssistant, entry: ConfigEntry) -> Store:
+    """Return the store holding the snapshot of a config entry."""
+    return Store[dict[str, Any]](hass, STORAGE_VERSION, f"{STORAGE_KEY}.{entry.entry_id}")
+
+
+async def async_load_snapshot(hass: HomeAssistant, entry: ConfigEntry) -> dict | None:
+    """Load the snapshot of the devices saved by the broker, if it is still usable."""
+    try:
+        snapshot = await _snapshot_store(hass, entry).async_load()
+    except Exception:
+        _LOGGER.debug("Unable to load the snapshot, doing a cold start", exc_info=True)
+        return None
+    if not snapshot:
+        return None
+    if snapshot.get("location", {}).get("locationId") != entry.data[CONF_LOCATION_ID]:
+        return None
+    return snapshot
+
+
 async def async_get_entry_scenes(entry: ConfigEntry, api):
     """Get the scenes within an integration."""
     try:
@@ -326,6 +392,40 @@ async def async_get_entry_scenes(entry: ConfigEntry, api):
     return []
 
 
+async def async_refresh_device_status(settings: SettingManager, devices: Iterable) -> list:
+    """Refresh the status of the devices and return the ones that failed.
+
+    Devices with custom settings are requested first. The number of requests in
+    flight is limited, their rate by the limiter of the entry, so large
+    locations are not throttled. Throttled and failed requests are retried by
+    the API itself.
+    """
+    semaphore = asyncio.Semaphore(settings.status_fetch_concurrency())
+    priority = settings.get_custom_device_ids()
+    failed = []
+
+    async def retrieve_device_status(device):
+        async with semaphore:
+            try:
+                await device.status.refresh()
+            except ClientResponseError:
+                _LOGGER.debug(
+                    (
+                        "Unable to update status for device: %s (%s), it will"
+                        " be retried later"
+                    ),
+                    device.label,
+                    device.device_id,
+                    exc_info=True,
+                )
+                failed.append(device)
+
+    # sorted is stable, so the order of the API is kept inside each group
+    ordered = sorted(devices, key=lambda device: device.device_id not in priority)
+    await asyncio.gather(*(retrieve_device_status(d) for d in ordered))
+    return failed
+
+
 async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Unload a config entry."""
     for listener in hass.data[DOMAIN]["listener"]:
@@ -334,13 +434,16 @@ async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     broker = hass.data[DOMAIN][DATA_BROKERS].pop(entry.entry_id, None)
     if broker:
         broker.disconnect()
+        await broker.async_save_snapshot()
 
-    return await hass.config_entries.async_unload_platforms(entry, SettingManager().get_enable_platforms())
+    if not broker:
+        return True
+    return await hass.config_entries.async_unload_platforms(entry, broker.settings.get_enable_platforms())
 
 
 async def async_remove_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
     """Perform clean-up when entry is being removed."""
-    api = SmartThings(async_get_clientsession(hass), entry.data[CONF_ACCESS_TOKEN])
+    api = SmartThings(await async_get_session(hass), entry.data[CONF_ACCESS_TOKEN])
 
     # Remove the installed_app, which if already removed raises a HTTPStatus.FORBIDDEN error.
     installed_app_id = entry.data[CONF_INSTALLED_APP_ID]
@@ -357,6 +460,8 @@ async def async_remove_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
             raise
     _LOGGER.debug("Removed installed app %s", installed_app_id)
 
+    await _snapshot_store(hass, entry).async_remove()
+
     # Remove the app if not referenced by other entries, which if already
     # removed raises a HTTPStatus.FORBIDDEN error.
     all_entries = hass.config_entries.async_entries(DOMAIN)
@@ -398,6 +503,7 @@ class DeviceBroker:
         smart_app,
         devices: Iterable,
         scenes: Iterable,
+        settings: SettingManager,
     ) -> None:
         """Create a new instance of the DeviceBroker."""
         self._hass = hass
@@ -407,10 +513,34 @@ class DeviceBroker:
         self._token = token
         self._event_disconnect = None
         self._regenerate_token_remove = None
+        self._pending_events = {}
+        self._flush_events_remove = None
+        self._status_retry = {}
+        self._status_retry_remove = None
+        self._status_retry_running = False
+        self.settings = settings
+        self._location = settings._location
+        self._snapshot_store = _snapshot_store(hass, entry)
+        self._snapshot_remove = None
+        self._snapshot_stop_remove = None
+        self._reconcile_remove = None
+        self.setup_timings = {}
+        self._capabilities = {}
+        self._capability_index = None
+        self._platform_factories = {}
+        self._custom_entities = {}
+        self._reload_lock = asyncio.Lock()
+        self._settings_watch_remove = None
+        self.poller = DevicePoller(hass, self)
+        self._resolvers = None
+        self._assignment_cache = {}
         self._assignments = self._assign_capabilities(devices)
         self.devices = {device.device_id: device for device in devices}
         self.scenes = {scene.scene_id: scene for scene in scenes}
         self._created_entities = []
+        # Only a broker restored from a snapshot holds all the devices from the start,
+        # a cold start must not save until the devices finished streaming in
+        self._snapshot_complete = bool(self.devices)
 
     def add_valid_entity(self, entity_id):
         self._created_entities.append(entity_id)
@@ -419,36 +549,310 @@ class DeviceBroker:
         return entity_id in self._created_entities
 
     def build_capability(self, device) -> dict:
+        if (cached := self._capabilities.get(device.device_id)) is not None and cached[0] is device:
+            return cached[1]
         capabilities = {}
         capabilities["main"] = device.capabilities
         for key, value in device.components.items():
             capabilities[key] = value
+        self._capabilities[device.device_id] = (device, capabilities)
         return capabilities
 
-    def _assign_capabilities(self, devices: Iterable):
-        """Assign platforms to capabilities."""
-        assignments = {}
-        for device in devices:
-            capabilities = device.capabilities.copy()
-            slots = {}
+    def create_custom_entities(self, platform, async_add_entities, factory) -> list:
+        """Create the entities of the custom settings of a platform.
+
+        The entities and the factory are kept so a reload of the settings
+        only has to replace the entities whose settings changed.
+        """
+        self._platform_factories[platform] = (async_add_entities, factory)
+        entities = self._custom_entities[platform] = {}
+        for setting in self.settings.get_capa_settings(self, platform):
+            _LOGGER.debug("cap setting : " + str(setting[1]))
+            entity = factory(setting)
+            entities[entity.unique_id] = (entity, setting[1])
+        return [entity for entity, _ in entities.values()]
+
+    async def async_reload_settings(self):
+        """Load the yaml file again and reconcile the entities with it.
+
+        The devices, their status and the cloud connection are kept. Only the
+        entities whose settings were added, removed or changed are touched.
+        """
+        async with self._reload_lock:
+            hass = self._hass
+            settings = SettingManager(hass, self._location)
+            try:
+                await hass.async_add_executor_job(settings.load_setting)
+            except Exception as ex:  # pylint:disable=broad-except
+                # Keep the current settings and wait for the file to change again
+                _LOGGER.error(
+                    "Unable to reload the settings of %s, keeping the current ones: %s",
+                    self._entry.title,
+                    ex,
+                )
+                self.settings.mtime = settings.mtime
+                return
+            settings.set_options(self._entry.options)
+
+            if settings.get_enable_platforms() != self.settings.get_enable_platforms():
+                _LOGGER.debug("Enabled platforms changed, reloading %s", self._entry.title)
+                hass.async_create_task(hass.config_entries.async_reload(self._entry.entry_id))
+                return
+
+            old_settings = self.settings
+            self.settings = settings
+            self._update_settings_watch()
+            entity_registry = er.async_get(hass)
+            added_count = removed_count = 0
+
+            for platform, (async_add_entities, factory) in self._platform_factories.items():
+                current = self._custom_entities.get(platform, {})
+                entities = {}
+                added = []
+                # Unchanged settings are matched on their dicts, without creating an entity
+                by_device = {}
+                for unique_id, (entity, conf) in current.items():
+                    by_device.setdefault(entity._device.device_id, []).append((unique_id, conf))
+                for setting in settings.get_capa_settings(self, platform):
+                    unique_id = next(
+                        (
+                            unique_id
+                            for unique_id, conf in by_device.get(setting[0].device_id, ())
+                            if unique_id in current and conf == setting[1]
+                        ),
+                        None,
+                    )
+                    if unique_id is not None:
+                        old = current.pop(unique_id)
+                        old[0]._setting_manager = settings
+                        entities[unique_id] = old
+                        continue
+                    entity = factory(setting)
+                    unique_id = entity.unique_id
+                    old = current.pop(unique_id, None)
+                    if old is not None:
+                        # Changed, the registry entry (and entity id) is kept
+                        await old[0].async_remove()
+                        removed_count += 1
+                    entities[unique_id] = (entity, setting[1])
+                    added.append(entity)
+
+                for entity, _ in current.values():
+                    if entity.entity_id and entity_registry.async_get(entity.entity_id):
+                        entity_registry.async_remove(entity.entity_id)
+                    else:
+                        await entity.async_remove()
+                    removed_count += 1
+
+                self._custom_entities[platform] = entities
+                if added:
+                    async_add_entities(added)
+                    added_count += len(added)
+
+            _LOGGER.debug(
+                "Reloaded settings of %s, %d entities added, %d removed",
+                self._entry.title,
+                added_count,
+                removed_count,
+            )
+
+            # Device rules change the subscription plan as well as the capabilities
+            if self._token is not None and (
+                settings.get_capabilities() != old_settings.get_capabilities()
+                or settings.get_device_setting() != old_settings.get_device_setting()
+            ):
+                pairs, uncovered = await smartapp_sync_subscriptions(
+                    hass,
+                    self._token.access_token,
+                    self._location.location_id,
+                    self._installed_app_id,
+                    list(self.devices.values()),
+                    settings,
+                )
+                self.poller.set_coverage(pairs, uncovered)
+
+    def _update_settings_watch(self):
+        """Start or stop watching the yaml file as the settings ask."""
+        if self.settings.watch_settings():
+            if self._settings_watch_remove is None:
+                self._settings_watch_remove = async_track_time_interval(
+                    self._hass, self._async_check_settings_file, SETTINGS_WATCH_INTERVAL
+                )
+        elif self._settings_watch_remove is not None:
+            self._settings_watch_remove()
+            self._settings_watch_remove = None
+
+    async def _async_check_settings_file(self, now=None):
+        """Reload the settings when the yaml file was modified."""
+        mtime = await self._hass.async_add_executor_job(self.settings.file_mtime)
+        if mtime is not None and mtime != self.settings.mtime:
+            await self.async_reload_settings()
+
+    def get_devices_with_capability(self, component, capability) -> list:
+        """Get the devices having the capability in the component, in the order of devices."""
+        if self._capability_index is None:
+            index = {}
+            for device in self.devices.values():
+                self._index_device(index, device)
+            self._capability_index = index
+        return self._capability_index.get((component, capability), [])
+
+    def _index_device(self, index: dict, device):
+        for key, value in self.build_capability(device).items():
+            for capa in value:
+                devices = index.setdefault((key, capa), [])
+                if not devices or devices[-1] is not device:
+                    devices.append(device)
+
+    @callback
+    def add_device(self, device):
+        """Add a device listed after the broker was created and create its entities."""
+        self.devices[device.device_id] = device
+        self._assignments.update(self._assign_capabilities([device]))
+        if self._capability_index is not None:
+            self._index_device(self._capability_index, device)
+
+        for platform, (async_add_entities, factory) in self._platform_factories.items():
+            entities = self._custom_entities.setdefault(platform, {})
+            added = []
+            for setting in self.settings.get_device_capa_settings(self, platform, device):
+                entity = factory(setting)
+                if entity.unique_id in entities:
+                    continue
+                entities[entity.unique_id] = (entity, setting[1])
+                added.append(entity)
+            if added:
+                async_add_entities(added)
+
+    async def async_stream_devices(self, api, installed_app):
+        """Add the devices of the location as the cloud lists them.
+
+        Each device goes page -> device -> status -> entities on its own, so
+        the first entities show up while the rest of the location loads.
+        The queue is bounded, the pages wait while the status requests lag.
+        """
+        start = monotonic()
+        settings = self.settings
+        concurrency = settings.status_fetch_concurrency()
+        priority = settings.get_custom_device_ids()
+        # Devices with custom settings are requested first
+        queue = asyncio.PriorityQueue(maxsize=concurrency * 4)
+        order = itertools.count()
+        failed = []
+
+        async def worker():
+            while True:
+                _, _, device = await queue.get()
+                try:
+                    try:
+                        await device.status.refresh()
+                    except ClientResponseError:
+                        _LOGGER.debug(
+                            "Unable to update status for device: %s (%s), it will be retried later",
+                            device.label,
+                            device.device_id,
+                            exc_info=True,
+                        )
+                        # Created unavailable, until the retry gets the status
+                        device.status._available = False
+                        failed.append(device)
+                    self.add_device(device)
+                except Exception:  # pylint:disable=broad-except
+                    _LOGGER.exception("Unable to add device: %s (%s)", device.label, device.device_id)
+                finally:
+                    queue.task_done()
+
+        workers = [asyncio.create_task(worker()) for _ in range(concurrency)]
+        try:
+            async with aclosing(
+                api.iter_devices(location_ids=[installed_app.location_id])
+            ) as devices:
+                async for device in devices:
+                    await queue.put((device.device_id not in priority, next(order), device))
+            await queue.join()
+            self.setup_timings["devices"] = monotonic() - start
+
+            pairs, uncovered = await _timed(
+                self.setup_timings,
+                "subscriptions",
+                smartapp_sync_subscriptions(
+                    self._hass,
+                    self._token.access_token,
+                    installed_app.location_id,
+                    installed_app.installed_app_id,
+                    list(self.devices.values()),
+                    settings,
+                ),
+            )
+        except (ClientResponseError, ClientConnectionError, asyncio.TimeoutError) as ex:
+            # Reconciling compares with the cloud and reloads with all the devices
+            _LOGGER.debug(ex, exc_info=True)
+            self._schedule_reconcile()
+            return
+        finally:
+            for task in workers:
+                task.cancel()
+
+        self.poller.set_coverage(pairs, uncovered)
+        self.retry_device_status(failed)
+        if self._status_retry and self._status_retry_remove is None:
+            self._status_retry_remove = async_track_time_interval(
+                self._hass, self._async_retry_device_status, STATUS_FETCH_RETRY_INTERVAL
+            )
+        self._snapshot_complete = True
+        self._snapshot_store.async_delay_save(self._snapshot, SNAPSHOT_SAVE_DELAY)
+        _LOGGER.debug(
+            "Loaded %s devices of %s, %s",
+            len(self.devices),
+            self._entry.title,
+            ", ".join(f"{phase}: {elapsed:.2f}s" for phase, elapsed in self.setup_timings.items()),
+        )
+
+    def _capability_resolvers(self) -> list:
+        """Get the get_capabilities function of the platforms, in the order of PLATFORMS."""
+        if self._resolvers is None:
+            resolvers = []
             for platform in PLATFORMS:
                 platform_module = importlib.import_module(
                     f".{platform}", self.__module__
                 )
-                if not hasattr(platform_module, "get_capabilities"):
-                    continue
-                assigned = platform_module.get_capabilities(capabilities)
-                if not assigned:
-                    continue
-                # Draw-down capabilities and set slot assignment
-                for capability in assigned:
-                    if capability not in capabilities:
-                        continue
-                    capabilities.remove(capability)
-                    slots[capability] = platform
+                if hasattr(platform_module, "get_capabilities"):
+                    resolvers.append((platform, platform_module.get_capabilities))
+            self._resolvers = resolvers
+        return self._resolvers
+
+    def _assign_capabilities(self, devices: Iterable):
+        """Assign platforms to capabilities.
+
+        Devices with the same capabilities get the same (shared, read only)
+        assignment, which is only computed once.
+        """
+        assignments = {}
+        for device in devices:
+            signature = frozenset(device.capabilities)
+            if (slots := self._assignment_cache.get(signature)) is None:
+                slots = self._assignment_cache[signature] = self._assign(device.capabilities)
             assignments[device.device_id] = slots
         return assignments
 
+    def _assign(self, capabilities: list) -> dict:
+        capabilities = list(capabilities)
+        slots = {}
+        for platform, get_capabilities in self._capability_resolvers():
+            assigned = get_capabilities(capabilities)
+            if not assigned:
+                continue
+            # Draw-down capabilities and set slot assignment
+            remaining = set(capabilities)
+            drawn = [c for c in dict.fromkeys(assigned) if c in remaining]
+            if not drawn:
+                continue
+            for capability in drawn:
+                slots[capability] = platform
+            drawn = set(drawn)
+            capabilities = [c for c in capabilities if c not in drawn]
+        return slots
+
     def connect(self):
         """Connect handlers/listeners for device/lifecycle events."""
 
@@ -456,6 +860,9 @@ class DeviceBroker:
         # Tokens expire in 30 days and once expired, cannot be recovered.
         async def regenerate_refresh_token(now):
             """Generate a new refresh token and update the config entry."""
+            if self._token is None:
+                # Not reconciled with the cloud yet
+                return
             await self._token.refresh(
                 self._entry.data[CONF_CLIENT_ID],
                 self._entry.data[CONF_CLIENT_SECRET],
@@ -468,12 +875,14 @@ class DeviceBroker:
                     CONF_REFRESH_TOKEN: self._token.refresh_token,
                 },
             )
+            bind_rate_limiter(self._token.access_token, self._installed_app_id)
             for id, device in self.devices.items():
                 device.status._api._token = self._token.access_token
 
             _LOGGER.debug(
-                "Regenerated refresh token for installed app: %s",
+                "Regenerated refresh token for installed app: %s, API requests: %s",
                 self._installed_app_id,
+                self.api_stats,
             )
 
         self._regenerate_token_remove = async_track_time_interval(
@@ -483,12 +892,245 @@ class DeviceBroker:
         # Connect handler to incoming device events
         self._event_disconnect = self._smart_app.connect_event(self._event_handler)
 
+        # Keep a snapshot of the devices for the next start
+        @callback
+        def save_snapshot(_now=None):
+            if self._snapshot_complete:
+                self._snapshot_store.async_delay_save(self._snapshot, SNAPSHOT_SAVE_DELAY)
+
+        self._snapshot_remove = async_track_time_interval(
+            self._hass, save_snapshot, SNAPSHOT_SAVE_INTERVAL
+        )
+        self._snapshot_stop_remove = self._hass.bus.async_listen_once(
+            EVENT_HOMEASSISTANT_STOP, save_snapshot
+        )
+        save_snapshot()
+
+        # Poll the devices that push does not cover
+        self.poller.start()
+
+        # Reload the settings when the yaml file changes
+        self._update_settings_watch()
+
+        # Refresh the devices whose status could not be retrieved at startup
+        if self._status_retry:
+            self._status_retry_remove = async_track_time_interval(
+                self._hass, self._async_retry_device_status, STATUS_FETCH_RETRY_INTERVAL
+            )
+
+    @property
+    def api_stats(self) -> dict:
+        """Get the request, retry and throttle counters of the entry."""
+        return {
+            **get_rate_limiter(self._installed_app_id).stats,
+            "http": get_session_stats(self._hass),
+        }
+
+    def retry_device_status(self, devices: Iterable):
+        """Refresh the status of the devices in the background until it succeeds.
+
+        The devices are unavailable until then, their status is not known.
+        """
+        for device in devices:
+            self._status_retry[device.device_id] = device
+            if device.status._available:
+                device.status._available = False
+                async_dispatcher_send(
+                    self._hass, f"{SIGNAL_SMARTTHINGS_AVAILABLE_UPDATE}_{device.device_id}"
+                )
+
+    async def _async_retry_device_status(self, now=None):
+        """Refresh the status of the devices that failed previously."""
+        # A pass may take longer than the interval
+        if self._status_retry_running:
+            return
+        self._status_retry_running = True
+        try:
+            devices = list(self._status_retry.values())
+            failed = await async_refresh_device_status(self.settings, devices)
+        finally:
+            self._status_retry_running = False
+        for device in devices:
+            if device in failed:
+                continue
+            self._status_retry.pop(device.device_id, None)
+            _LOGGER.debug("Retrieved status for device: %s (%s)", device.label, device.device_id)
+            device.status._available = True
+            self._dispatch_device_refresh(device)
+
+        if not self._status_retry and self._status_retry_remove:
+            self._status_retry_remove()
+            self._status_retry_remove = None
+
+    @callback
+    def _dispatch_device_refresh(self, device):
+        """Notify all the entities of a device that its whole status was refreshed."""
+        device_id = device.device_id
+        async_dispatcher_send(self._hass, format_update_signal(device_id), [])
+        for component_id, capabilities in device.status._status.items():
+            for capability, attributes in capabilities.items():
+                for attribute in attributes:
+                    async_dispatcher_send(
+                        self._hass,
+                        format_update_signal(device_id, component_id, capability, attribute),
+                        [],
+                    )
+
     def disconnect(self):
         """Disconnects handlers/listeners for device/lifecycle events."""
         if self._regenerate_token_remove:
             self._regenerate_token_remove()
         if self._event_disconnect:
             self._event_disconnect()
+        if self._flush_events_remove:
+            self._flush_events_remove()
+            self._flush_events_remove = None
+        self._pending_events.clear()
+        if self._status_retry_remove:
+            self._status_retry_remove()
+            self._status_retry_remove = None
+        if self._snapshot_remove:
+            self._snapshot_remove()
+            self._snapshot_remove = None
+        if self._snapshot_stop_remove:
+            self._snapshot_stop_remove()
+            self._snapshot_stop_remove = None
+        if self._reconcile_remove:
+            self._reconcile_remove()
+            self._reconcile_remove = None
+        if self._settings_watch_remove:
+            self._settings_watch_remove()
+            self._settings_watch_remove = None
+        self.poller.stop()
+
+    def _snapshot(self) -> dict:
+        """Return the data needed to create the entities without the cloud."""
+        return {
+            "location": location_to_data(self._location),
+            "devices": [device.to_data() for device in self.devices.values()],
+            "status": {
+                device_id: device.status.to_data()
+                for device_id, device in self.devices.items()
+            },
+            "scenes": [scene_to_data(scene) for scene in self.scenes.values()],
+        }
+
+    async def async_save_snapshot(self):
+        """Save the snapshot of the devices now."""
+        if not self._snapshot_complete:
+            return
+        try:
+            await self._snapshot_store.async_save(self._snapshot())
+        except Exception:
+            _LOGGER.debug("Unable to save the snapshot", exc_info=True)
+
+    def _layout(self, devices: Iterable, scenes: Iterable) -> tuple:
+        """Return what the entities are created from, to detect changes in the cloud.
+
+        The capabilities are built like build_capability, without caching them,
+        as the devices may be throwaway copies from the cloud.
+        """
+        return (
+            {
+                device.device_id: (device.type, {"main": device.capabilities, **device.components})
+                for device in devices
+            },
+            {scene.scene_id for scene in scenes},
+        )
+
+    async def async_reconcile(self, _now=None):
+        """Bring the devices restored from the snapshot up to date with the cloud."""
+        self._reconcile_remove = None
+        hass = self._hass
+        entry = self._entry
+        try:
+            api = SmartThings_custom(await async_get_session(hass), entry.data[CONF_ACCESS_TOKEN])
+            installed_app, token = await asyncio.gather(
+                validate_installed_app(api, self._installed_app_id),
+                async_rotate_token(hass, entry, api),
+            )
+            self._token = token
+            for device in self.devices.values():
+                device.status._api._token = token.access_token
+
+            api = SmartThings_custom(await async_get_session(hass), token.access_token)
+            location, devices, scenes = await asyncio.gather(
+                api.location(installed_app.location_id),
+                api.devices(location_ids=[installed_app.location_id]),
+                async_get_entry_scenes(entry, api),
+            )
+
+            # The settings file is named after the location
+            if location.name != self._location.name or self._layout(
+                devices, scenes
+            ) != self._layout(self.devices.values(), self.scenes.values()):
+                # Devices, capabilities or the location changed, the entities must be created again
+                _LOGGER.debug("Location or devices changed since the snapshot, reloading %s", entry.title)
+                # The unload must not write the outdated snapshot back
+                self._snapshot_complete = False
+                await self._snapshot_store.async_remove()
+                hass.async_create_task(hass.config_entries.async_reload(entry.entry_id))
+                return
+
+            # Names and labels may have changed
+            for device in devices:
+                self.devices[device.device_id].apply_data(device.to_data())
+
+            failed_devices, (pairs, uncovered) = await asyncio.gather(
+                async_refresh_device_status(self.settings, list(self.devices.values())),
+                smartapp_sync_subscriptions(
+                    hass,
+                    token.access_token,
+                    installed_app.location_id,
+                    installed_app.installed_app_id,
+                    devices,
+                    self.settings,
+                ),
+            )
+        except ClientResponseError as ex:
+            if ex.status in (HTTPStatus.UNAUTHORIZED, HTTPStatus.FORBIDDEN):
+                _LOGGER.exception(
+                    (
+                        "Unable to update configuration entry '%s' - please reconfigure"
+                        " the integration"
+                    ),
+                    entry.title,
+                )
+                hass.async_create_task(hass.config_entries.async_remove(entry.entry_id))
+                # only create new flow if there isn't a pending one for SmartThings.
+                if not hass.config_entries.flow.async_progress_by_handler(DOMAIN):
+                    hass.async_create_task(
+                        hass.config_entries.flow.async_init(
+                            DOMAIN, context={"source": SOURCE_IMPORT}
+                        )
+                    )
+                return
+            _LOGGER.debug(ex, exc_info=True)
+            self._schedule_reconcile()
+            return
+        except (ClientConnectionError, asyncio.TimeoutError) as ex:
+            _LOGGER.debug(ex, exc_info=True)
+            self._schedule_reconcile()
+            return
+
+        for device in self.devices.values():
+            if device not in failed_devices:
+                self._dispatch_device_refresh(device)
+        self.poller.set_coverage(pairs, uncovered)
+        self.retry_device_status(failed_devices)
+        if self._status_retry and self._status_retry_remove is None:
+            self._status_retry_remove = async_track_time_interval(
+                hass, self._async_retry_device_status, STATUS_FETCH_RETRY_INTERVAL
+            )
+        self._snapshot_complete = True
+        self._snapshot_store.async_delay_save(self._snapshot, SNAPSHOT_SAVE_DELAY)
+        _LOGGER.debug("Reconciled %s with the cloud", entry.title)
+
+    def _schedule_reconcile(self):
+        """Try to reconcile again later."""
+        self._reconcile_remove = async_call_later(
+            self._hass, STATUS_FETCH_RETRY_INTERVAL, self.async_reconcile
+        )
 
     def get_assigned(self, device_id: str, platform: str):
         """Get the capabilities assigned to the platform."""
@@ -507,25 +1149,67 @@ class DeviceBroker:
         if req.installed_app_id != self._installed_app_id:
             return
 
-        updated_devices = set()
-        for evt in req.events:
-            if evt.event_type != EVENT_TYPE_DEVICE:
-                continue
+        for evt in req.device_events():
             if not (device := self.devices.get(evt.device_id)):
                 continue
-            device.status.apply_attribute_update(
-                evt.component_id,
-                evt.capability,
-                evt.attribute,
-                evt.value,
-                data=evt.data,
-            )
+            self.poller.push_received(device.device_id, evt.capability)
+            self._apply_event(device, evt)
+
+        self._schedule_flush()
+
+    async def async_get_device_status(self, device_id: str) -> dict:
+        """Get the status of a device from the cloud with the current token."""
+        api = Api(await async_get_session(self._hass), self._entry.data[CONF_ACCESS_TOKEN])
+        return await api.get_device_status(device_id)
+
+    def apply_device_status(self, device, data: dict) -> set:
+        """Merge a polled status like push events, return the capabilities that changed."""
+        changed = set()
+        status = device.status._status
+        for component_id, capabilities in (data or {}).get("components", {}).items():
+            for capability, attributes in capabilities.items():
+                current = status.get(component_id, {}).get(capability, {})
+                for attribute, value in attributes.items():
+                    old = current.get(attribute)
+                    if (
+                        old is not None
+                        and old.value == value.get("value")
+                        and old.data == value.get("data")
+                    ):
+                        continue
+                    evt = DeviceEvent(
+                        device.device_id,
+                        component_id,
+                        capability,
+                        attribute,
+                        value.get("value"),
+                        value.get("data"),
+                        device.location_id,
+                    )
+                    self._apply_event(device, evt, value.get("unit"), polled=True)
+                    changed.add(capability)
+        if changed:
+            _LOGGER.debug("Polled changes of %s on device %s", ", ".join(sorted(changed)), device.label)
+            self._schedule_flush()
+        return changed
+
+    def _apply_event(self, device, evt, unit=None, polled=False):
+        """Apply a device event to the status and queue it for the entities."""
+        changed = device.status.apply_attribute_update(
+            evt.component_id,
+            evt.capability,
+            evt.attribute,
+            evt.value,
+            unit=unit,
+            data=evt.data,
+        )
 
-            # Fire events for buttons
-            if (
-                evt.capability == Capability.button
-                and evt.attribute == Attribute.button
-            ):
+        # Fire events for buttons, a polled value is not a press
+        if (
+            evt.capability == Capability.button
+            and evt.attribute == Attribute.button
+        ):
+            if not polled:
                 data = {
                     "component_id": evt.component_id,
                     "device_id": evt.device_id,
@@ -536,18 +1220,51 @@ class DeviceBroker:
                 }
                 self._hass.bus.async_fire(EVENT_BUTTON, data)
                 _LOGGER.debug("Fired button event: %s", data)
-            else:
-                data = {
-                    "location_id": evt.location_id,
-                    "device_id": evt.device_id,
-                    "component_id": evt.component_id,
-                    "capability": evt.capability,
-                    "attribute": evt.attribute,
-                    "value": evt.value,
-                    "data": evt.data,
-                }
-                _LOGGER.debug("Push update received: %s", data)
+        else:
+            data = {
+                "location_id": evt.location_id,
+                "device_id": evt.device_id,
+                "component_id": evt.component_id,
+                "capability": evt.capability,
+                "attribute": evt.attribute,
+                "value": evt.value,
+                "data": evt.data,
+            }
+            _LOGGER.debug("%s update received: %s", "Poll" if polled else "Push", data)
+
+        if not changed and self.settings.skip_unchanged_events():
+            return
 
-            updated_devices.add(device.device_id)
+        # Merge bursts: only the latest event per attribute is kept
+        self._pending_events.setdefault(device.device_id, {})[
+            (evt.component_id, evt.capability, evt.attribute)
+        ] = evt
 
-        async_dispatcher_send(self._hass, SIGNAL_SMARTTHINGS_UPDATE, updated_devices, evt)
+    def _schedule_flush(self):
+        """Flush the pending events now or at the end of the coalescing window."""
+        if not self._pending_events:
+            return
+        if (window := self.settings.event_coalesce_window()) <= 0:
+            self._flush_events()
+        elif self._flush_events_remove is None:
+            self._flush_events_remove = async_call_later(
+                self._hass, window, self._flush_events
+            )
+
+    @callback
+    def _flush_events(self, _now=None):
+        """Notify the entities of the devices updated since the last flush."""
+        self._flush_events_remove = None
+        pending = self._pending_events
+        self._pending_events = {}
+
+        # Only wake the entities listening to the devices (and attributes)
+        # that were actually part of the update.
+        for device_id, merged in pending.items():
+            async_dispatcher_send(
+                self._hass, format_update_signal(device_id), list(merged.values())
+            )
+            for key, evt in merged.items():
+                async_dispatcher_send(
+                    self._hass, format_update_signal(device_id, *key), [evt]
+                )
@@ -55,18 +55,19 @@ async def async_setup_entry(
     """Add binary sensors for a config entry."""
     broker = hass.data[DOMAIN][DATA_BROKERS][config_entry.entry_id]
     sensors = []
-    if SettingManager.enable_default_entities():
+    if broker.settings.enable_default_entities():
         for device in broker.devices.values():
-            if SettingManager.allow_device(device.device_id) == False:
+            if broker.settings.allow_device(device.device_id) == False:
                 continue
             for capability in broker.get_assigned(device.device_id, Platform.BINARY_SENSOR):
                 attrib = CAPABILITY_TO_ATTRIB[capability]
                 sensors.append(SmartThingsBinarySensor(device, attrib))
 
-    settings = SettingManager.get_capa_settings(broker, Platform.BINARY_SENSOR)
-    for s in settings:
-        _LOGGER.debug("cap setting : " + str(s[1]))
-        sensors.append(SmartThingsBinarySensor_custom(hass=hass, setting=s))
+    sensors.extend(
+        broker.create_custom_entities(
+            Platform.BINARY_SENSOR, async_add_entities, lambda s: SmartThingsBinarySensor_custom(hass=hass, setting=s)
+        )
+    )
 
     async_add_entities(sensors)
 
@@ -6,7 +6,7 @@ from collections.abc import Iterable, Sequence
 import logging
 from typing import Any
 
-from .pysmartthings import Attribute, Capability
+from .pysmartthings import Attribute, Capability, command_batch
 
 from homeassistant.components.climate import (
     ATTR_HVAC_MODE,
@@ -94,9 +94,9 @@ async def async_setup_entry(
 
     broker = hass.data[DOMAIN][DATA_BROKERS][config_entry.entry_id]
     entities: list[ClimateEntity] = []
-    if SettingManager.enable_default_entities():
+    if broker.settings.enable_default_entities():
         for device in broker.devices.values():
-            if SettingManager.allow_device(device.device_id) == False:
+            if broker.settings.allow_device(device.device_id) == False:
                 continue
             if not broker.any_assigned(device.device_id, CLIMATE_DOMAIN):
                 continue
@@ -108,11 +108,11 @@ async def async_setup_entry(
 
     broker = hass.data[DOMAIN][DATA_BROKERS][config_entry.entry_id]
 
-    settings = SettingManager.get_capa_settings(broker, Platform.CLIMATE)
-    for s in settings:
-        _LOGGER.debug("cap setting : " + str(s[1]))
-
-        entities.append(SmartThingsClimate_custom(hass=hass, setting=s))
+    entities.extend(
+        broker.create_custom_entities(
+            Platform.CLIMATE, async_add_entities, lambda s: SmartThingsClimate_custom(hass=hass, setting=s)
+        )
+    )
 
     async_add_entities(entities, True)
 
@@ -196,36 +196,38 @@ class SmartThingsThermostat(SmartThingsEntity, ClimateEntity):
 
     async def async_set_temperature(self, **kwargs: Any) -> None:
         """Set new operation mode and target temperatures."""
-        # Operation state
-        if operation_state := kwargs.get(ATTR_HVAC_MODE):
-            mode = STATE_TO_MODE[operation_state]
-            await self._device.set_thermostat_mode(mode, set_status=True)
-            await self.async_update()
-
-        # Heat/cool setpoint
-        heating_setpoint = None
-        cooling_setpoint = None
-        if self.hvac_mode == HVACMode.HEAT:
-            heating_setpoint = kwargs.get(ATTR_TEMPERATURE)
-        elif self.hvac_mode == HVACMode.COOL:
-            cooling_setpoint = kwargs.get(ATTR_TEMPERATURE)
-        else:
-            heating_setpoint = kwargs.get(ATTR_TARGET_TEMP_LOW)
-            cooling_setpoint = kwargs.get(ATTR_TARGET_TEMP_HIGH)
-        tasks = []
-        if heating_setpoint is not None:
-            tasks.append(
-                self._device.set_heating_setpoint(
-                    round(heating_setpoint, 3), set_status=True
+        # All the commands are sent to the device in a single request
+        async with command_batch():
+            # Operation state
+            if operation_state := kwargs.get(ATTR_HVAC_MODE):
+                mode = STATE_TO_MODE[operation_state]
+                await self._device.set_thermostat_mode(mode, set_status=True)
+                await self.async_update()
+
+            # Heat/cool setpoint
+            heating_setpoint = None
+            cooling_setpoint = None
+            if self.hvac_mode == HVACMode.HEAT:
+                heating_setpoint = kwargs.get(ATTR_TEMPERATURE)
+            elif self.hvac_mode == HVACMode.COOL:
+                cooling_setpoint = kwargs.get(ATTR_TEMPERATURE)
+            else:
+                heating_setpoint = kwargs.get(ATTR_TARGET_TEMP_LOW)
+                cooling_setpoint = kwargs.get(ATTR_TARGET_TEMP_HIGH)
+            tasks = []
+            if heating_setpoint is not None:
+                tasks.append(
+                    self._device.set_heating_setpoint(
+                        round(heating_setpoint, 3), set_status=True
+                    )
                 )
-            )
-        if cooling_setpoint is not None:
-            tasks.append(
-                self._device.set_cooling_setpoint(
-                    round(cooling_setpoint, 3), set_status=True
+            if cooling_setpoint is not None:
+                tasks.append(
+                    self._device.set_cooling_setpoint(
+                        round(cooling_setpoint, 3), set_status=True
+                    )
                 )
-            )
-        await asyncio.gather(*tasks)
+            await asyncio.gather(*tasks)
 
         # State is set optimistically in the commands above, therefore update
         # the entity state ahead of receiving the confirming push updates
@@ -358,36 +360,40 @@ class SmartThingsAirConditioner(SmartThingsEntity, ClimateEntity):
         if hvac_mode == HVACMode.OFF:
             await self.async_turn_off()
             return
-        tasks = []
-        # Turn on the device if it's off before setting mode.
-        if not self._device.status.switch:
-            tasks.append(self._device.switch_on(set_status=True))
-        tasks.append(
-            self._device.set_air_conditioner_mode(
-                STATE_TO_AC_MODE[hvac_mode], set_status=True
+        # All the commands are sent to the device in a single request
+        async with command_batch():
+            tasks = []
+            # Turn on the device if it's off before setting mode.
+            if not self._device.status.switch:
+                tasks.append(self._device.switch_on(set_status=True))
+            tasks.append(
+                self._device.set_air_conditioner_mode(
+                    STATE_TO_AC_MODE[hvac_mode], set_status=True
+                )
             )
-        )
-        await asyncio.gather(*tasks)
+            await asyncio.gather(*tasks)
         # State is set optimistically in the command above, therefore update
         # the entity state ahead of receiving the confirming push updates
         self.async_write_ha_state()
 
     async def async_set_temperature(self, **kwargs: Any) -> None:
         """Set new target temperature."""
-        tasks = []
-        # operation mode
-        if operation_mode := kwargs.get(ATTR_HVAC_MODE):
-            if operation_mode == HVACMode.OFF:
-                tasks.append(self._device.switch_off(set_status=True))
-            else:
-                if not self._device.status.switch:
-                    tasks.append(self._device.switch_on(set_status=True))
-                tasks.append(self.async_set_hvac_mode(operation_mode))
-        # temperature
-        tasks.append(
-            self._device.set_cooling_setpoint(kwargs[ATTR_TEMPERATURE], set_status=True)
-        )
-        await asyncio.gather(*tasks)
+        # All the commands are sent to the device in a single request
+        async with command_batch():
+            tasks = []
+            # operation mode
+            if operation_mode := kwargs.get(ATTR_HVAC_MODE):
+                if operation_mode == HVACMode.OFF:
+                    tasks.append(self._device.switch_off(set_status=True))
+                else:
+                    if not self._device.status.switch:
+                        tasks.append(self._device.switch_on(set_status=True))
+                    tasks.append(self.async_set_hvac_mode(operation_mode))
+            # temperature
+            tasks.append(
+                self._device.set_cooling_setpoint(kwargs[ATTR_TEMPERATURE], set_status=True)
+            )
+            await asyncio.gather(*tasks)
         # State is set optimistically in the command above, therefore update
         # the entity state ahead of receiving the confirming push updates
         self.async_write_ha_state()
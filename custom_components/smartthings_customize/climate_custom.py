@@ -108,6 +108,12 @@ class SmartThingsClimate_custom(SmartThingsEntity_custom, ClimateEntity):
 
         self.set_preset_modes()
 
+    def _iter_capability_configs(self):
+        yield from super()._iter_capability_configs()
+        for attr, modes in self._ext_attr.items():
+            for capa in modes.values():
+                yield attr, capa
+
     def entity_listener(self, entity, old_state, new_state):
         self.schedule_update_ha_state(True)
 
@@ -266,12 +272,13 @@ class SmartThingsClimate_custom(SmartThingsEntity_custom, ClimateEntity):
             return
 
         mode = self.get_mapping_key(ATTR_MODE, CONF_MODE_MAPPING, hvac_mode.value)
-        if self._capability.get(ATTR_SWITCH) and not self.is_on:
-            await self.async_turn_on()
+        async with command_batch():
+            if self._capability.get(ATTR_SWITCH) and not self.is_on:
+                await self.async_turn_on()
 
-        if ATTR_SWITCH != self.get_capability(ATTR_MODE):
-            if mode != self.get_attr_value(ATTR_MODE, CONF_STATE):
-                await self.send_command(ATTR_MODE, self.get_command(ATTR_MODE), [mode])
+            if ATTR_SWITCH != self.get_capability(ATTR_MODE):
+                if mode != self.get_attr_value(ATTR_MODE, CONF_STATE):
+                    await self.send_command(ATTR_MODE, self.get_command(ATTR_MODE), [mode])
     
     async def async_set_preset_mode(self, preset_mode: str) -> None:
         preset_mode = self.get_mapping_key(ATTR_PRESET_MODE, CONF_MODE_MAPPING, preset_mode)
@@ -289,10 +296,11 @@ class SmartThingsClimate_custom(SmartThingsEntity_custom, ClimateEntity):
         await self.send_command(ATTR_TARGET_HUM, self.get_command(ATTR_TARGET_HUM), [humidity])
 
     async def async_set_temperature(self, **kwargs) -> None:
-        for key, value in kwargs.items():
-            if key != "entity_id":
-                if key == "temperature": key = ATTR_TARGET_TEMP
-                await self.send_command(key, self.get_command(key), [value])
+        async with command_batch():
+            for key, value in kwargs.items():
+                if key != "entity_id":
+                    if key == "temperature": key = ATTR_TARGET_TEMP
+                    await self.send_command(key, self.get_command(key), [value])
 
     async def async_turn_on(self) -> None:
         await self.send_command(ATTR_SWITCH, self.get_command(ATTR_SWITCH, {STATE_ON: STATE_ON}).get(STATE_ON), self.get_argument(ATTR_SWITCH, {STATE_ON: []}).get(STATE_ON, []))
@@ -7,7 +7,7 @@ from homeassistant.const import (
     STATE_UNKNOWN, STATE_UNAVAILABLE, CONF_ICON, CONF_VALUE_TEMPLATE,
 )
 import homeassistant.helpers.config_validation as cv
-from .pysmartthings.device import DeviceEntity
+from .pysmartthings.device import DeviceEntity, command_batch
 from .const import *
 
 from homeassistant.helpers.dispatcher import (
@@ -22,9 +22,13 @@ from homeassistant.helpers import (
 )
 
 from homeassistant.helpers.entity import DeviceInfo, Entity
+from homeassistant.helpers.event import TrackTemplate, async_track_template_result
+from homeassistant.helpers.template import Template
+from homeassistant.exceptions import TemplateError
+from collections import OrderedDict
 import string
 import logging
-from time import time
+from time import time, monotonic
 from operator import *
 
 from homeassistant.util import slugify
@@ -40,6 +44,124 @@ class format_util(string.Template):
     delimiter = "%"
 
 
+def format_update_signal(device_id, component_id=None, capability=None, attribute=None) -> str:
+    """Build the dispatcher signal used for updates of a device (or one of its attributes)."""
+    signal = f"{SIGNAL_SMARTTHINGS_UPDATE}_{device_id}"
+    if component_id is not None and capability is not None and attribute is not None:
+        signal = f"{signal}_{component_id}_{capability}_{attribute}"
+    return signal
+
+
+def get_template(hass, source) -> Template:
+    """Return the compiled template of a source, shared through an LRU cache."""
+    if hass is None:
+        return cv.template(source)
+    cache = hass.data.setdefault(DOMAIN, {}).setdefault(DATA_TEMPLATES, OrderedDict())
+    if (template := cache.get(source)) is not None:
+        cache.move_to_end(source)
+        return template
+    template = Template(str(source), hass)
+    template.ensure_valid()
+    cache[source] = template
+    if len(cache) > TEMPLATE_CACHE_SIZE:
+        cache.popitem(last=False)
+    return template
+
+
+class _MissingAccessor:
+    """Accessor of an option that is not set."""
+
+    __slots__ = ()
+
+    def value(self, default=None):
+        return default
+
+    def status(self, default=None):
+        return default
+
+
+class _ConstantAccessor:
+    """Accessor of an option holding a plain value."""
+
+    __slots__ = ("_value",)
+
+    def __init__(self, value) -> None:
+        self._value = value
+
+    def value(self, default=None):
+        return self._value
+
+    def status(self, default=None):
+        return default
+
+
+class _StatusAccessor:
+    """Accessor reading an attribute straight from the device status.
+
+    The status keeps the same dict for a capability, so it is referenced once
+    it exists. Until then it is looked up on read, the status is never changed.
+    """
+
+    __slots__ = ("_status", "_component", "_capability", "_attributes", "_attribute")
+
+    def __init__(self, status: dict, component, capability, attribute) -> None:
+        self._status = status
+        self._component = component
+        self._capability = capability
+        self._attributes = None
+        self._attribute = attribute
+
+    def _resolve(self):
+        if self._attributes is None:
+            self._attributes = self._status.get(self._component, {}).get(self._capability)
+        return self._attributes
+
+    def value(self, default=None):
+        if (attributes := self._resolve()) is None or (status := attributes.get(self._attribute)) is None:
+            return default
+        return status.value
+
+    def status(self, default=None):
+        if (attributes := self._resolve()) is None:
+            return default
+        return attributes.get(self._attribute, default)
+
+
+class _TemplateAccessor:
+    """Accessor rendering a pre-parsed value_template."""
+
+    __slots__ = ("_template", "_tracked", "_result")
+
+    def __init__(self, template) -> None:
+        self._template = template
+        self._tracked = False
+        self._result = None
+
+    @property
+    def template(self) -> Template:
+        return self._template
+
+    def set_result(self, result):
+        """Keep the result rendered by a template listener."""
+        self._tracked = True
+        self._result = None if isinstance(result, TemplateError) else result
+
+    def value(self, default=None):
+        if self._tracked:
+            return self._result
+        try:
+            return self._template.async_render()
+        except Exception:
+            _LOGGER.debug("template render error : " + traceback.format_exc())
+            return None
+
+    def status(self, default=None):
+        return default
+
+
+MISSING_ACCESSOR = _MissingAccessor()
+
+
 class SmartThingsEntity_custom(Entity):
     """Defines a SmartThings entity."""
 
@@ -49,6 +171,7 @@ class SmartThingsEntity_custom(Entity):
         """Initialize the instance."""
         self._hass = hass
         self._device = setting[0]
+        self._setting_manager = setting[2]
 
         component = setting[1].get(CONF_COMPONENT)
         capability = setting[1].get(CONF_CAPABILITY)
@@ -60,23 +183,25 @@ class SmartThingsEntity_custom(Entity):
         self._icon = setting[1].get(CONF_ICON)
 
         self._extra_state_attributes = {}
-        if SettingManager.enable_syntax_property():
+        if self._setting_manager.enable_syntax_property():
             self._extra_state_attributes[ATTR_SYNTAX] = setting[1]
 
         self._dispatcher_remove = None
         self._device_info = []
         self._platform = platform
+        self._update_events = None
 
         self._capability = {}
         self._capability[platform] = setting[1]
+        self._accessors = {}
 
         t = format_util(DEFAULT_UNIQUE_ID_FORMAT)
         unique_id_format = t.substitute(device_id=self._device.device_id, device_type=self._device.type, label=self._device.label, component=component,
                                         capability=capability, attribute=attribute, command=command, name=name)
         self._unique_id = "{}".format(platform + "." + unique_id_format)
 
-        entity_id_format = SettingManager.default_entity_id_format(
-        ) if SettingManager.default_entity_id_format() != None else DEFAULT_ENTITY_ID_FORMAT
+        entity_id_format = self._setting_manager.default_entity_id_format(
+        ) if self._setting_manager.default_entity_id_format() != None else DEFAULT_ENTITY_ID_FORMAT
         if setting[1].get(CONF_ENTITY_ID_FORMAT) != None:
             entity_id_format = setting[1].get(CONF_ENTITY_ID_FORMAT)
         t = format_util(entity_id_format)
@@ -147,32 +272,28 @@ class SmartThingsEntity_custom(Entity):
 
     async def async_added_to_hass(self):
         """Device added to hass."""
+        # Accessors read before hass was attached hold templates outside the shared cache
+        self._accessors.clear()
+        self.compile_accessors()
+        if self._setting_manager.template_render_on_change():
+            self.async_track_templates()
         self.set_timestamp()
 
         # [해결 1] 초기 로드 시점에도 가용성 체크를 한 번 실행합니다.
         self._check_and_broadcast_availability()
 
-        @callback
-        def async_update_state(devices, evt):
-            """Update device state."""
-            if self._device.device_id in devices:
-                if eq(self._device.device_id, evt.device_id):
-                    for key, cap in self._capability.items():
-                        if eq(self.get_component(key), evt.component_id) and eq(self.get_capability(key), evt.capability):
-                            self.set_timestamp()
-                
-                # 이벤트 수신 시 가용성 다시 체크
-                self._check_and_broadcast_availability()
-                
-                # 내 UI 상태 갱신
-                self.async_write_ha_state()
-
         # 외부 이벤트 수신 디스패처
-        self.async_on_remove(
-            async_dispatcher_connect(
-                self.hass, SIGNAL_SMARTTHINGS_UPDATE, async_update_state
+        # 설정에서 읽는 속성이 변경되었을 때만 깨어나도록 속성 단위로 구독합니다.
+        # 템플릿이 있는 경우 읽는 속성을 알 수 없으므로 기기 단위로 구독합니다.
+        watched = self.get_watched_attributes()
+        if watched is None:
+            signals = [format_update_signal(self._device.device_id)]
+        else:
+            signals = [format_update_signal(self._device.device_id, *key) for key in watched]
+        for signal in signals:
+            self.async_on_remove(
+                async_dispatcher_connect(self.hass, signal, self._async_handle_update)
             )
-        )
 
         # '나 자신' 혹은 '다른 엔티티'가 상태 변경을 방송했을 때 UI를 갱신하는 리스너
         @callback
@@ -191,6 +312,62 @@ class SmartThingsEntity_custom(Entity):
         if self._dispatcher_remove:
             self._dispatcher_remove()
 
+    def _iter_capability_configs(self):
+        """Return (key, config) pairs of every setting the entity may read."""
+        return self._capability.items()
+
+    def get_watched_attributes(self) -> set | None:
+        """Return the (component, capability, attribute) keys read by the settings.
+
+        Options are read in their dict form, in a list of dicts, or from the
+        attribute of the setting itself. None is returned when a value is
+        rendered from a template, or when no attribute was found, because the
+        attributes read are not known.
+        """
+        base = self._capability[self._platform]
+        watched = set()
+        for key, conf in self._iter_capability_configs():
+            component = conf.get(CONF_COMPONENT, base.get(CONF_COMPONENT))
+            capability = conf.get(CONF_CAPABILITY, base.get(CONF_CAPABILITY))
+            if (attribute := conf.get(CONF_ATTRIBUTE)) is not None:
+                watched.add((component, capability, attribute))
+            for value in conf.values():
+                values = value if isinstance(value, list) else [value]
+                for value in values:
+                    if not isinstance(value, dict):
+                        continue
+                    if value.get(CONF_VALUE_TEMPLATE):
+                        return None
+                    if (attribute := value.get(CONF_ATTRIBUTE)) is not None:
+                        watched.add((
+                            value.get(CONF_COMPONENT, component),
+                            value.get(CONF_CAPABILITY, capability),
+                            attribute,
+                        ))
+        return watched or None
+
+    @callback
+    def _async_handle_update(self, events):
+        """Collect the events of one update and write the state once."""
+        if self._update_events is None:
+            self._update_events = []
+            self.hass.loop.call_soon(self._async_process_update)
+        self._update_events.extend(events)
+
+    @callback
+    def _async_process_update(self):
+        """Update device state."""
+        events, self._update_events = self._update_events or [], None
+        pairs = {(self.get_component(key), self.get_capability(key)) for key in self._capability}
+        if any((evt.component_id, evt.capability) in pairs for evt in events):
+            self.set_timestamp()
+
+        # 이벤트 수신 시 가용성 다시 체크
+        self._check_and_broadcast_availability()
+
+        # 내 UI 상태 갱신
+        self.async_write_ha_state()
+
     def set_timestamp(self):
         self._extra_state_attributes[CONF_LAST_TIMESTAMP] = time()
 
@@ -305,34 +482,80 @@ class SmartThingsEntity_custom(Entity):
         except:
             return default
 
+    def _compile_accessor(self, conf, attr):
+        """Turn one option of a setting into an accessor."""
+        if attr not in conf:
+            return MISSING_ACCESSOR
+        value = conf[attr]
+        if not isinstance(value, dict):
+            return _ConstantAccessor(value)
+        if value_template := value.get(CONF_VALUE_TEMPLATE):
+            try:
+                return _TemplateAccessor(get_template(self.hass, value_template))
+            except Exception:
+                _LOGGER.debug("template compile error : " + traceback.format_exc())
+                return _ConstantAccessor(None)
+        base = self._capability[self._platform]
+        component = value.get(CONF_COMPONENT, conf.get(CONF_COMPONENT, base.get(CONF_COMPONENT)))
+        capa = value.get(CONF_CAPABILITY, conf.get(CONF_CAPABILITY, base.get(CONF_CAPABILITY)))
+        if component is None or capa is None:
+            return MISSING_ACCESSOR
+        return _StatusAccessor(self._device.status._status, component, capa, value.get(CONF_ATTRIBUTE))
+
+    def get_accessor(self, platform, attr):
+        """Return the compiled accessor of an option, or None if the platform is not configured."""
+        if (conf := self._capability.get(platform)) is None:
+            return None
+        key = (id(conf), attr)
+        if (entry := self._accessors.get(key)) is None or entry[0] is not conf:
+            entry = self._accessors[key] = (conf, self._compile_accessor(conf, attr))
+        return entry[1]
+
+    def compile_accessors(self):
+        """Compile the accessors of every option ahead of the first property read."""
+        for key, conf in self._iter_capability_configs():
+            for attr in conf:
+                entry_key = (id(conf), attr)
+                if entry_key not in self._accessors:
+                    self._accessors[entry_key] = (conf, self._compile_accessor(conf, attr))
+
+    @callback
+    def async_track_templates(self):
+        """Render the value_template options only when the entities they use change."""
+        accessors = {}
+        for conf, accessor in self._accessors.values():
+            if isinstance(accessor, _TemplateAccessor):
+                accessors.setdefault(accessor.template, []).append(accessor)
+        if not accessors:
+            return
+
+        @callback
+        def _async_templates_changed(event, updates):
+            for update in updates:
+                for accessor in accessors.get(update.template, ()):
+                    accessor.set_result(update.result)
+            if event is not None:
+                self.async_write_ha_state()
+
+        info = async_track_template_result(
+            self.hass,
+            [TrackTemplate(template, None) for template in accessors],
+            _async_templates_changed,
+        )
+        self.async_on_remove(info.async_remove)
+        info.async_refresh()
+
     def get_attr_unit(self, platform, default=None):
-        conf = self._capability[platform].get(CONF_STATE, default)
-        if str(type(conf)) == "<class 'dict'>":
-            if status := self.get_attr_status(conf, platform):
-                return status.unit
+        if (accessor := self.get_accessor(platform, CONF_STATE)) is None:
+            return default
+        if status := accessor.status():
+            return status.unit
         return default
 
     def get_attr_value(self, platform, attr, default = None):
-        try:
-            #_LOGGER.debug("extra capa : " + str(self._capability[platform]))
-            value = self._capability[platform].get(attr, default)
-            #_LOGGER.debug("platform : " + str(platform) + ", attr : " + str(attr) + ", value: " + str(value) + ", type : " + str(type(value)))
-            if isinstance(value, dict):
-                # if status := self.get_attr_status(value, platform, default):
-                #     _LOGGER.error("set status value: " + str(status.value))
-                #     value = status.value
-                
-                # value_template check
-                if value_template := value.get(CONF_VALUE_TEMPLATE):
-                    value = cv.template(value_template).async_render()
-                else:
-                    component = value.get(CONF_COMPONENT, self.get_component(platform))
-                    capa = value.get(CONF_CAPABILITY, self.get_capability(platform))
-                    #_LOGGER.debug("get dict attr - platform : " + str(platform) + ", component : " + str(component) + ", capa : " + str(capa) + ", default : " + str(default))
-                    value = self._get_attr_status_value(component, capa, value.get(CONF_ATTRIBUTE), default=default)
-            return value
-        except Exception as e:
-            _LOGGER.debug("error : " + traceback.format_exc())
+        if (accessor := self.get_accessor(platform, attr)) is None:
+            return None
+        return accessor.value(default)
 
     def get_attribute(self, platform, default=None):
         try:
@@ -375,31 +598,45 @@ class SmartThingsEntity_custom(Entity):
                 break;
         return key
 
+# libyaml loader when it is available, it is several times faster
+YAML_LOADER = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
 class SettingManager(object):
-    def __new__(cls, *args, **kwargs):
-        if not hasattr(cls, "_instance"):
-            cls._instance = super().__new__(cls) 
-        return cls._instance
-
-    def __init__(self, location = None):
-        cls = type(self)
-        if not hasattr(cls, "_init"):
-            self._location = location
-            self._settings = None
-            self._options = {}
-            self._platforms = set()
-            self._default_settings = None
-            #self.load_setting()
-
-            cls._init = True
+    """Settings of one location, loaded from its yaml file and owned by its DeviceBroker."""
+
+    def __init__(self, hass=None, location = None):
+        self.hass = hass
+        self._location = location
+        self._settings = None
+        self._options = {}
+        self._platforms = set()
+        self._default_settings = None
+        self._global_rules = {}
+        self._device_rules = {}
+        self._custom_devices = set()
+        self._ignored_devices = set()
+        self.mtime = None
+        self.parse_time = 0.0
+        #self.load_setting()
 
     def init(self, hass, location):
         self.hass = hass
         self._location = location
 
+    @property
+    def filepath(self) -> str:
+        return DOMAIN + "/" + self._location.name + ".yaml"
+
+    def file_mtime(self):
+        """Return the modification time of the yaml file, None if it does not exist."""
+        try:
+            return os.path.getmtime(self.filepath)
+        except OSError:
+            return None
+
     def load_setting(self):
         # 셋팅을 로드
-        filepath = DOMAIN + "/" + self._location.name + ".yaml"
+        filepath = self.filepath
         if os.path.isdir(DOMAIN) == False:
             os.makedirs(DOMAIN)
         if os.path.isfile(filepath) == False:
@@ -410,37 +647,69 @@ class SettingManager(object):
                 f.write("default_entity_id_format: '"'st_custom_%{device_id}_%{label}_%{component}_%{capability}_%{attribute}_%{command}_%{name}'"'\n\n")
                 pass
         
-        with open(filepath, "r") as fp:
-            self._settings = yaml.load(fp, Loader=yaml.FullLoader)
-            _LOGGER.debug("full settings error : " + str(self._settings))
+        self.mtime = self.file_mtime()
+        with open(filepath, "rb") as fp:
+            data = fp.read()
+
+        start = monotonic()
+        self._settings = yaml.load(data, Loader=YAML_LOADER)
+        self.parse_time = monotonic() - start
+        _LOGGER.debug("full settings error : " + str(self._settings))
 
         self.build_platform()
+        self.build_index()
+
+    def build_index(self):
+        """Index the rules of the settings by platform, so platform setup only does lookups."""
+        self._global_rules = {}
+        self._device_rules = {}
+        self._custom_devices = set()
+        self._ignored_devices = set()
+
+        try:
+            if default_setting := self._settings.get(GLOBAL_SETTING):
+                for platform in PLATFORMS:
+                    self._global_rules[platform] = list(default_setting.get(platform) or [])
+                self._ignored_devices = set(default_setting.get("ignore_devices") or [])
+        except Exception as e:
+            _LOGGER.debug("build_index globals error : " + traceback.format_exc())
+
+        try:
+            for device_setting in self._settings.get(DEVICE_SETTING) or []:
+                device_id = device_setting["device_id"]
+                self._custom_devices.add(device_id)
+                parent_entity_id = device_setting.get("parent_entity_id", None)
+                for platform in PLATFORMS:
+                    for setting in device_setting.get(platform) or []:
+                        if parent_entity_id:
+                            setting[CONF_PARENT_ENTITY_ID] = parent_entity_id
+                        self._device_rules.setdefault(platform, []).append(
+                            (device_id, device_setting.get("type", None), setting)
+                        )
+        except Exception as e:
+            _LOGGER.debug("build_index devices error : " + traceback.format_exc())
 
-    @staticmethod
-    def set_options(options):
-        mgr = SettingManager()
+    def set_options(self, options):
+        mgr = self
         mgr._options = options
 
-    @staticmethod
-    def get_default_setting():
+    def get_default_setting(self):
         try:
-            mgr = SettingManager()
+            mgr = self
             return mgr._settings.get(GLOBAL_SETTING)
         except Exception as e:
             _LOGGER.debug("get_default_setting error : " + traceback.format_exc())
             return None
 
-    @staticmethod
-    def get_device_setting():
+    def get_device_setting(self):
         try:
-            mgr = SettingManager()
+            mgr = self
             return mgr._settings.get(DEVICE_SETTING)
         except Exception as e:
             _LOGGER.debug("get_device_setting error : " + traceback.format_exc())
             return None
 
-    @staticmethod
-    def parse_capability(setting):
+    def parse_capability(self, setting):
         capabilities = []
         for platform in PLATFORMS:
             if setting.get(platform):
@@ -454,11 +723,10 @@ class SettingManager(object):
         return capabilities
 
 
-    @staticmethod
-    def get_capabilities() -> list[str]:
+    def get_capabilities(self) -> list[str]:
         capabilities = []
         try:
-            inst = SettingManager()
+            inst = self
             
             if default_setting := inst.get_default_setting():
                 capabilities.extend(inst.parse_capability(default_setting))
@@ -471,85 +739,177 @@ class SettingManager(object):
             _LOGGER.exception("get_capabilities error")
         return capabilities
 
-    @staticmethod
-    def get_capa_settings(broker, platform):
+    def get_subscription_pairs(self, devices, capabilities) -> set:
+        """Return the (device id, capability) pairs read by the settings.
+
+        Global rules read every device that is not customized or ignored,
+        device rules only read their own device.
+        """
+        pairs = set()
+        try:
+            device_capabilities = {}
+            for setting in self.get_device_setting() or []:
+                device_capabilities.setdefault(setting["device_id"], set()).update(
+                    self.parse_capability(setting)
+                )
+            for device in devices:
+                device_id = device.device_id
+                if device_id in self._custom_devices:
+                    wanted = device_capabilities.get(device_id, set())
+                elif device_id in self._ignored_devices:
+                    continue
+                else:
+                    wanted = capabilities
+                supported = set(device.capabilities)
+                for value in device.components.values():
+                    supported.update(value)
+                pairs.update((device_id, capability) for capability in supported & wanted & capabilities)
+        except Exception as e:
+            _LOGGER.debug("get_subscription_pairs error : " + traceback.format_exc())
+        return pairs
+
+    def get_capa_settings(self, broker, platform):
+        mgr = self
         settings = []
         try:
-            if default_setting := SettingManager.get_default_setting():
-                if default_setting.get(platform):
-                    for setting in default_setting.get(platform):
-                        for device in broker.devices.values():
-                            if SettingManager.allow_device_custom(device.device_id):
-                                capabilities = broker.build_capability(device)
-                                for key, value in capabilities.items():
-                                    if setting.get("component") == key and setting.get("capability") in value:
-                                        settings.append([device, setting])
+            for setting in mgr._global_rules.get(platform, []):
+                for device in broker.get_devices_with_capability(setting.get("component"), setting.get("capability")):
+                    if self.allow_device_custom(device.device_id):
+                        settings.append([device, setting, self])
         except Exception as e:
             _LOGGER.debug("get_capa_settings_1 error : " + traceback.format_exc())
             pass
         
         try:
-            if s := SettingManager.get_device_setting():
-                for device_setting in s:
-                    if device_setting["device_id"] in broker.devices:
-                        capabilities = broker.build_capability(broker.devices[device_setting["device_id"]])
-                        if device_type := device_setting.get("type", None):
-                            if device_type.lower() != broker.devices[device_setting["device_id"]].type.lower():
-                                continue
-                        if platform not in device_setting:
-                            continue
-                        for setting in device_setting.get(platform, []):
-                            if setting.get("component") in capabilities and setting.get("capability") in capabilities[setting.get("component")]:
-                                if parent_entity_id := device_setting.get("parent_entity_id", None):
-                                    setting[CONF_PARENT_ENTITY_ID] = parent_entity_id
-                                settings.append(
-                                    [broker.devices[device_setting["device_id"]], setting])
+            for device_id, device_type, setting in mgr._device_rules.get(platform, []):
+                if (device := broker.devices.get(device_id)) is None:
+                    continue
+                if device_type and device_type.lower() != device.type.lower():
+                    continue
+                capabilities = broker.build_capability(device)
+                if setting.get("component") in capabilities and setting.get("capability") in capabilities[setting.get("component")]:
+                    settings.append([device, setting, self])
         except Exception as e:
             _LOGGER.debug("get_capa_settings_2 error : " + traceback.format_exc())
             pass
 
         return settings
 
-    @staticmethod
-    def default_entity_id_format() -> str:
+    def get_device_capa_settings(self, broker, platform, device):
+        """Return the settings of a platform that apply to one device, like get_capa_settings."""
+        mgr = self
+        settings = []
+        capabilities = broker.build_capability(device)
+        try:
+            if self.allow_device_custom(device.device_id):
+                for setting in mgr._global_rules.get(platform, []):
+                    if setting.get("capability") in capabilities.get(setting.get("component"), []):
+                        settings.append([device, setting, self])
+        except Exception as e:
+            _LOGGER.debug("get_device_capa_settings_1 error : " + traceback.format_exc())
+
+        try:
+            for device_id, device_type, setting in mgr._device_rules.get(platform, []):
+                if device_id != device.device_id:
+                    continue
+                if device_type and device_type.lower() != device.type.lower():
+                    continue
+                if setting.get("component") in capabilities and setting.get("capability") in capabilities[setting.get("component")]:
+                    settings.append([device, setting, self])
+        except Exception as e:
+            _LOGGER.debug("get_device_capa_settings_2 error : " + traceback.format_exc())
+
+        return settings
+
+    def default_entity_id_format(self) -> str:
         try:
-            return SettingManager()._settings.get("default_entity_id_format")
+            return self._settings.get("default_entity_id_format")
         except Exception as e:
             _LOGGER.debug("default_entity_id_format error : " + traceback.format_exc())
             return False 
 
-    @staticmethod
-    def enable_syntax_property() -> bool:
-        return SettingManager()._options.get(CONF_ENABLE_SYNTAX_PROPERTY, False)
+    def event_coalesce_window(self) -> float:
+        """Return the event coalescing window in seconds."""
+        try:
+            window = self._settings.get(CONF_EVENT_COALESCE_WINDOW)
+            return max(float(window or DEFAULT_EVENT_COALESCE_WINDOW), 0) / 1000
+        except Exception as e:
+            _LOGGER.debug("event_coalesce_window error : " + traceback.format_exc())
+            return DEFAULT_EVENT_COALESCE_WINDOW / 1000
+
+    def skip_unchanged_events(self) -> bool:
+        """Return True when events that do not change a value must not update the entities."""
+        try:
+            return bool(self._settings.get(CONF_SKIP_UNCHANGED_EVENTS, False))
+        except Exception as e:
+            _LOGGER.debug("skip_unchanged_events error : " + traceback.format_exc())
+            return False
 
+    def template_render_on_change(self) -> bool:
+        """Return True when value_template options are rendered only when their entities change."""
+        try:
+            return bool(self._settings.get(CONF_TEMPLATE_RENDER_ON_CHANGE, False))
+        except Exception as e:
+            _LOGGER.debug("template_render_on_change error : " + traceback.format_exc())
+            return False
 
-    @staticmethod
-    def enable_default_entities() -> bool:
+    def watch_settings(self) -> bool:
+        """Return True when the yaml file must be reloaded as soon as it changes."""
+        try:
+            return bool(self._settings.get(CONF_WATCH_SETTINGS, False))
+        except Exception as e:
+            _LOGGER.debug("watch_settings error : " + traceback.format_exc())
+            return False
+
+    def status_fetch_concurrency(self) -> int:
+        """Return the number of device status requested at the same time."""
+        try:
+            concurrency = self._settings.get(CONF_STATUS_FETCH_CONCURRENCY)
+            return max(int(concurrency or DEFAULT_STATUS_FETCH_CONCURRENCY), 1)
+        except Exception as e:
+            _LOGGER.debug("status_fetch_concurrency error : " + traceback.format_exc())
+            return DEFAULT_STATUS_FETCH_CONCURRENCY
+
+    def poll_budget(self) -> float:
+        """Return the number of device status polled per minute, 0 to disable polling."""
+        try:
+            budget = self._settings.get(CONF_POLL_BUDGET, DEFAULT_POLL_BUDGET)
+            return max(float(budget), 0)
+        except Exception as e:
+            _LOGGER.debug("poll_budget error : " + traceback.format_exc())
+            return DEFAULT_POLL_BUDGET
+
+    def get_custom_device_ids(self) -> set:
+        """Return the ids of the devices having settings in the devices section."""
+        try:
+            return set(self._custom_devices)
+        except Exception as e:
+            _LOGGER.debug("get_custom_device_ids error : " + traceback.format_exc())
+            return set()
+
+    def enable_syntax_property(self) -> bool:
+        return self._options.get(CONF_ENABLE_SYNTAX_PROPERTY, False)
+
+
+    def enable_default_entities(self) -> bool:
         return False
-        #return SettingManager()._options.get(CONF_ENABLE_DEFAULT_ENTITIES, False)
+        #return self._options.get(CONF_ENABLE_DEFAULT_ENTITIES, False)
 
-    @staticmethod
-    def resetting_entities() -> bool:
-        return SettingManager()._options.get(CONF_RESETTING_ENTITIES, False)
+    def resetting_entities(self) -> bool:
+        return self._options.get(CONF_RESETTING_ENTITIES, False)
 
-    @staticmethod
-    def allow_device(device_id) -> bool:
+    def allow_device(self, device_id) -> bool:
         try:
-            mgr = SettingManager()
+            mgr = self
             return device_id not in mgr._settings.get(GLOBAL_SETTING, {}).get("ignore_devices", [])
         except Exception as e:
             _LOGGER.debug("allow_device error : " + traceback.format_exc())
             return True
 
-    @staticmethod
-    def allow_device_custom(device_id) -> bool:
+    def allow_device_custom(self, device_id) -> bool:
         try:
-            mgr = SettingManager()
-            setting = mgr.get_device_setting()
-            if setting != None:
-                for d in mgr.get_device_setting():
-                    if device_id == d.get("device_id"): return False
-            return device_id not in mgr._settings.get(GLOBAL_SETTING).get("ignore_devices")
+            mgr = self
+            return device_id not in mgr._custom_devices and device_id not in mgr._ignored_devices
         except Exception as e:
             _LOGGER.debug("allow_device_custom error : " + traceback.format_exc())
             return True
@@ -565,46 +925,41 @@ class SettingManager(object):
 
     def allow_platform(self, platform) -> bool:
         try:
-            mgr = SettingManager()
+            mgr = self
             return platform not in mgr._settings.get("ignore_platforms")
         except Exception as e:
             _LOGGER.debug("is_allow_platform error : " + traceback.format_exc())
             return True 
 
-    @staticmethod
-    def ignore_platforms():
+    def ignore_platforms(self):
         try:
-            mgr = SettingManager()
+            mgr = self
             return mgr._settings.get("ignore_platforms")
         except Exception as e:
             _LOGGER.debug("ignore_platforms error : " + traceback.format_exc())
             return []
 
-    @staticmethod
-    def ignore_capabilities():
+    def ignore_capabilities(self):
         try:
-            mgr = SettingManager()
+            mgr = self
             return mgr._settings.get(GLOBAL_SETTING).get("ignore_capabilities", [])
         except Exception as e:
             _LOGGER.debug("ignore_capabilities error : " + traceback.format_exc())
             return []
 
-    @staticmethod
-    def subscribe_capabilities():
+    def subscribe_capabilities(self):
         try:
-            mgr = SettingManager()
+            mgr = self
             return mgr._settings.get("subscribe_capabilities", [])
         except Exception as e:
             _LOGGER.debug("allow_capabilities error : " + traceback.format_exc())
             return []
 
-    @staticmethod
-    def allow_capability(capability):
-        return capability not in SettingManager().ignore_capabilities()
+    def allow_capability(self, capability):
+        return capability not in self.ignore_capabilities()
 
-    @staticmethod
-    def ignore_capability(capability):
-        return capability in SettingManager().ignore_capabilities()
+    def ignore_capability(self, capability):
+        return capability in self.ignore_capabilities()
 
 
 class SmartThingsEntity(Entity):
@@ -620,13 +975,12 @@ class SmartThingsEntity(Entity):
     async def async_added_to_hass(self):
         """Device added to hass."""
 
-        async def async_update_state(devices):
+        async def async_update_state(events):
             """Update device state."""
-            if self._device.device_id in devices:
-                await self.async_update_ha_state(True)
+            await self.async_update_ha_state(True)
 
         self._dispatcher_remove = async_dispatcher_connect(
-            self.hass, SIGNAL_SMARTTHINGS_UPDATE, async_update_state
+            self.hass, format_update_signal(self._device.device_id), async_update_state
         )
 
     async def async_will_remove_from_hass(self) -> None:
@@ -647,6 +1001,11 @@ class SmartThingsEntity(Entity):
             sw_version=self._device.status.ocf_firmware_version,
         )
 
+    @property
+    def available(self) -> bool:
+        """Return False while the status of the device could not be retrieved."""
+        return self._device.status._available
+
     @property
     def name(self) -> str:
         """Return the name of the device."""
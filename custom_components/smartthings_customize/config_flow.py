@@ -12,11 +12,11 @@ import voluptuous as vol
 
 from homeassistant.config_entries import SOURCE_REAUTH, ConfigFlow, ConfigFlowResult, OptionsFlow
 from homeassistant.const import CONF_ACCESS_TOKEN, CONF_CLIENT_ID, CONF_CLIENT_SECRET
-from homeassistant.helpers.aiohttp_client import async_get_clientsession
 
 import homeassistant.helpers.config_validation as cv
 from homeassistant.core import callback
 
+from .custom_api import async_get_session
 from .const import (
     APP_OAUTH_CLIENT_NAME,
     APP_OAUTH_SCOPES,
@@ -29,6 +29,7 @@ from .const import (
     #CONF_ENABLE_DEFAULT_ENTITIES,
     CONF_RESETTING_ENTITIES,
     CONF_ENABLE_SYNTAX_PROPERTY,
+    CONF_OFFLOAD_WEBHOOK,
 )
 from .smartapp import (
     create_app,
@@ -115,7 +116,7 @@ class SmartThingsFlowHandler(ConfigFlow, domain=DOMAIN):
             return self._show_step_pat(errors)
 
         # Setup end-point
-        self.api = SmartThings(async_get_clientsession(self.hass), self.access_token)
+        self.api = SmartThings(await async_get_session(self.hass), self.access_token)
         try:
             app = await find_app(self.hass, self.api)
             if app:
@@ -331,6 +332,7 @@ class OptionsFlowHandler(OptionsFlow):
                         #vol.Optional(CONF_ENABLE_DEFAULT_ENTITIES, default=options.get(CONF_ENABLE_DEFAULT_ENTITIES, False)): cv.boolean,
                         vol.Optional(CONF_ENABLE_SYNTAX_PROPERTY, default=options.get(CONF_ENABLE_SYNTAX_PROPERTY, False)): cv.boolean,
                         vol.Optional(CONF_RESETTING_ENTITIES, default=options.get(CONF_RESETTING_ENTITIES, False)): cv.boolean,
+                        vol.Optional(CONF_OFFLOAD_WEBHOOK, default=options.get(CONF_OFFLOAD_WEBHOOK, False)): cv.boolean,
                     }
             ), errors=errors
         )
@@ -23,6 +23,7 @@ CONF_ENABLE_SYNTAX_PROPERTY = "enable_syntax_property"
 
 DATA_MANAGER = "manager"
 DATA_BROKERS = "brokers"
+DATA_TEMPLATES = "templates"
 EVENT_BUTTON = "smartthings_customize.button"
 
 SIGNAL_SMARTTHINGS_UPDATE = "smartthings_customize_update"
@@ -33,6 +34,11 @@ SETTINGS_INSTANCE_ID = "hassInstanceId"
 
 SUBSCRIPTION_WARNING_LIMIT = 40
 
+# Apps whose settings are requested at the same time when looking for the app
+FIND_APP_CONCURRENCY = 8
+# Instance id of the apps already looked at, kept in the integration store
+CONF_APP_INSTANCES = "app_instances"
+
 STORAGE_KEY = DOMAIN
 STORAGE_VERSION = 1
 
@@ -108,6 +114,54 @@ IGNORED_CAPABILITIES = [
 
 TOKEN_REFRESH_INTERVAL = timedelta(hours=12)
 
+# Time (ms) during which push events of a device are merged before the
+# entities are written. 0 disables coalescing.
+CONF_EVENT_COALESCE_WINDOW = "event_coalesce_window"
+DEFAULT_EVENT_COALESCE_WINDOW = 0
+
+# Do not update the entities when an event repeats the current value
+CONF_SKIP_UNCHANGED_EVENTS = "skip_unchanged_events"
+
+# Render value_template options only when the entities they use change
+CONF_TEMPLATE_RENDER_ON_CHANGE = "template_render_on_change"
+# Number of compiled value_template kept in the template cache
+TEMPLATE_CACHE_SIZE = 256
+
+# Device status fetch done while the config entry is set up
+CONF_STATUS_FETCH_CONCURRENCY = "status_fetch_concurrency"
+DEFAULT_STATUS_FETCH_CONCURRENCY = 8
+STATUS_FETCH_RETRY_INTERVAL = timedelta(minutes=1)
+
+# Polling of the devices whose attributes are not pushed. Requests per minute,
+# 0 disables polling.
+CONF_POLL_BUDGET = "poll_budget"
+DEFAULT_POLL_BUDGET = 30
+POLL_TICK_INTERVAL = timedelta(seconds=10)
+# Seconds between two polls of a device, doubled while nothing changes
+POLL_MIN_INTERVAL = 30
+POLL_MAX_INTERVAL = 900
+
+# Verify and decode the webhook requests in the executor (option)
+CONF_OFFLOAD_WEBHOOK = "offload_webhook"
+DATA_WEBHOOK_QUEUE = "webhook_queue"
+WEBHOOK_WORKERS = 2
+# Requests waiting for a worker, SmartThings gets a 503 beyond that
+WEBHOOK_QUEUE_SIZE = 32
+
+# HTTP client shared by every request of the integration
+DATA_SESSION = DOMAIN + "_session"
+HTTP_LIMIT_PER_HOST = 16
+HTTP_DNS_CACHE_TTL = 300
+HTTP_KEEPALIVE_TIMEOUT = 60
+
+# Reload the yaml file when it changes
+CONF_WATCH_SETTINGS = "watch_settings"
+SETTINGS_WATCH_INTERVAL = timedelta(seconds=10)
+
+# Snapshot of the devices used to create the entities before the cloud answers
+SNAPSHOT_SAVE_INTERVAL = timedelta(minutes=10)
+SNAPSHOT_SAVE_DELAY = 30
+
 VAL_UID = "^(?:([0-9a-fA-F]{32})|([0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}))$"
 VAL_UID_MATCHER = re.compile(VAL_UID)
 
@@ -38,12 +38,12 @@ async def async_setup_entry(
 ) -> None:
     """Add covers for a config entry."""
     broker = hass.data[DOMAIN][DATA_BROKERS][config_entry.entry_id]
-    if SettingManager.enable_default_entities():
+    if broker.settings.enable_default_entities():
         async_add_entities(
             [
                 SmartThingsCover(device)
                 for device in broker.devices.values()
-                if broker.any_assigned(device.device_id, COVER_DOMAIN) and SettingManager.allow_device(device.device_id)
+                if broker.any_assigned(device.device_id, COVER_DOMAIN) and broker.settings.allow_device(device.device_id)
             ],
             True,
         )
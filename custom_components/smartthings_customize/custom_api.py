@@ -1,8 +1,15 @@
+import asyncio
 import logging
 import aiohttp
 import json
-from homeassistant.util import ssl
 import traceback
+from time import monotonic
+from types import SimpleNamespace
+
+from aiohttp.hdrs import USER_AGENT
+from homeassistant.const import EVENT_HOMEASSISTANT_CLOSE
+from homeassistant.helpers.aiohttp_client import SERVER_SOFTWARE
+from homeassistant.util import ssl
 
 import json
 import os
@@ -10,12 +17,89 @@ import os
 from .pysmartthings import App
 
 import traceback
-from .const import DOMAIN
+from .const import (
+    DOMAIN,
+    DATA_SESSION,
+    HTTP_DNS_CACHE_TTL,
+    HTTP_KEEPALIVE_TIMEOUT,
+    HTTP_LIMIT_PER_HOST,
+)
 
 _LOGGER = logging.getLogger(__name__)
 
 BASE = DOMAIN + "/"
 
+def _create_app_info_ssl_context():
+    # Blocking, the certificates are loaded from the disk
+    context = ssl.client_context()
+    # Legacy renegotiation (OP_LEGACY_SERVER_CONNECT), only for the app info request
+    context.options |= 0x00040000
+    return context
+
+
+def _create_trace_config(stats):
+    """Log the time of every request and count them."""
+    async def on_request_start(session, ctx, params):
+        ctx.start = monotonic()
+
+    async def on_request_end(session, ctx, params):
+        elapsed = monotonic() - ctx.start
+        stats["requests"] += 1
+        stats["time"] += elapsed
+        _LOGGER.debug("%s %s: %s in %.3fs", params.method, params.url.path, params.response.status, elapsed)
+
+    async def on_connection_create_end(session, ctx, params):
+        stats["connections"] += 1
+
+    async def on_connection_reuseconn(session, ctx, params):
+        stats["reused"] += 1
+
+    trace_config = aiohttp.TraceConfig()
+    trace_config.on_request_start.append(on_request_start)
+    trace_config.on_request_end.append(on_request_end)
+    trace_config.on_connection_create_end.append(on_connection_create_end)
+    trace_config.on_connection_reuseconn.append(on_connection_reuseconn)
+    return trace_config
+
+
+async def async_get_session(hass) -> aiohttp.ClientSession:
+    """Return the HTTP session shared by the integration, creating it on first use."""
+    if (client := hass.data.get(DATA_SESSION)) is None:
+        client = hass.data[DATA_SESSION] = SimpleNamespace(session=None, stats=None, lock=asyncio.Lock())
+    if client.session is not None:
+        return client.session
+
+    async with client.lock:
+        if client.session is not None:
+            return client.session
+        client.stats = {"requests": 0, "time": 0.0, "connections": 0, "reused": 0}
+        connector = aiohttp.TCPConnector(
+            ssl=ssl.get_default_context(),
+            limit_per_host=HTTP_LIMIT_PER_HOST,
+            ttl_dns_cache=HTTP_DNS_CACHE_TTL,
+            keepalive_timeout=HTTP_KEEPALIVE_TIMEOUT,
+        )
+        client.session = aiohttp.ClientSession(
+            connector=connector,
+            headers={USER_AGENT: SERVER_SOFTWARE},
+            trace_configs=[_create_trace_config(client.stats)],
+        )
+
+        async def close(event):
+            _LOGGER.debug("HTTP session stats: %s", client.stats)
+            await client.session.close()
+
+        hass.bus.async_listen_once(EVENT_HOMEASSISTANT_CLOSE, close)
+        return client.session
+
+
+def get_session_stats(hass) -> dict:
+    """Return the request and connection counters of the shared session."""
+    if (client := hass.data.get(DATA_SESSION)) is None or client.stats is None:
+        return {}
+    return dict(client.stats)
+
+
 async def async_remove_app_info(hass, app_id):
     try:
         path = BASE + app_id + ".json"
@@ -42,12 +126,13 @@ async def async_get_app_info(hass, app_id, token):
             return app
         else:
             url = "https://api.smartthings.com/v1/apps/" + app_id
-            custom_ssl_context = ssl.get_default_context()
-            custom_ssl_context.options |= 0x00040000
             headers={"Authorization": "Bearer " + token}
 
+            custom_ssl_context = await hass.async_add_executor_job(_create_app_info_ssl_context)
             connector = aiohttp.TCPConnector(ssl=custom_ssl_context)
-            async with aiohttp.ClientSession(connector=connector, headers=headers) as session:
+            async with aiohttp.ClientSession(
+                connector=connector, headers={USER_AGENT: SERVER_SOFTWARE}
+            ) as session:
                 async with session.get(url, headers=headers) as response:
                     if response.status == 200:
                         raw_data = await response.read()
@@ -1,26 +1,130 @@
-from .pysmartthings import SmartThings, DeviceEntity, Device, DeviceStatus, DeviceStatusBase
-from typing import Any, Dict, Mapping, Optional, Sequence, Tuple
+from .pysmartthings import SmartThings, DeviceEntity, Device, DeviceStatus, DeviceStatusBase, LocationEntity, SceneEntity
+from collections.abc import MutableMapping
+from contextlib import aclosing
+from sys import intern
+from typing import Any, AsyncIterator, Dict, Mapping, Optional, Sequence, Tuple
 from .pysmartthings.entity import Entity
 from aiohttp import ClientSession
 from typing import List, Optional, Sequence
 from .pysmartthings.api import Api
-from .pysmartthings.device import Status
+from .pysmartthings.device import Status, STATUS_NONE, DEVICE_TYPE_DTH
 
 import logging
 _LOGGER = logging.getLogger(__name__)
 
+class ComponentAttributes(MutableMapping):
+    """Attributes of a component by name, read from the status by capability.
+
+    This serves the upstream DeviceStatusBase attributes without keeping a
+    second copy of them. Missing attributes read as STATUS_NONE. When two
+    capabilities share an attribute name, the one updated last is read, as
+    the upstream single dict kept the last written value.
+    """
+
+    __slots__ = ["_capabilities", "_index", "_latest", "_orphans"]
+
+    def __init__(self, capabilities: dict):
+        self._capabilities = capabilities
+        self._index = None
+        # Capability updated last for an attribute, survives invalidate()
+        self._latest = {}
+        # Attributes set through the view that belong to no capability
+        self._orphans = {}
+
+    def invalidate(self):
+        """Forget the attribute index after attributes were added or removed."""
+        self._index = None
+
+    def reset(self):
+        """Forget the index and the update order after the whole status was replaced."""
+        self._index = None
+        self._latest.clear()
+
+    def touch(self, attribute, attributes: dict):
+        """Read the attribute from the capability attributes it was just written to."""
+        self._latest[attribute] = attributes
+        if self._index is not None:
+            self._index[attribute] = attributes
+
+    def _lookup(self) -> dict:
+        if self._index is None:
+            index = {}
+            # Later capabilities win, as in the upstream apply_data
+            for attributes in self._capabilities.values():
+                for attribute in attributes:
+                    index[attribute] = attributes
+            for attribute, attributes in self._latest.items():
+                if attribute in attributes:
+                    index[attribute] = attributes
+            self._index = index
+        return self._index
+
+    def __getitem__(self, attribute):
+        if (attributes := self._lookup().get(attribute)) is not None and attribute in attributes:
+            return attributes[attribute]
+        return self._orphans.get(attribute, STATUS_NONE)
+
+    def get(self, attribute, default=None):
+        return self[attribute] if attribute in self else default
+
+    def __setitem__(self, attribute, status):
+        if (attributes := self._lookup().get(attribute)) is not None:
+            attributes[attribute] = status
+        else:
+            self._orphans[attribute] = status
+
+    def __delitem__(self, attribute):
+        if attribute in self._lookup():
+            # Upstream kept one value per name, remove it from every capability
+            for attributes in self._capabilities.values():
+                attributes.pop(attribute, None)
+            self._latest.pop(attribute, None)
+            self._index = None
+        else:
+            del self._orphans[attribute]
+
+    def __contains__(self, attribute):
+        return attribute in self._lookup() or attribute in self._orphans
+
+    def __iter__(self):
+        yield from self._lookup()
+        yield from self._orphans
+
+    def __len__(self):
+        return len(self._lookup()) + len(self._orphans)
+
+
 class DeviceStatus_custom(DeviceStatus):
+    """Status of a device, stored once by component, capability and attribute.
+
+    The upstream attributes and components are views over the same records.
+    """
+
     def __init__(self, api: Api, device_id: str, data=None):
         """Create a new instance of the DeviceStatusEntity class."""
-        super().__init__(api, device_id, data)
         self._api = api
         self._device_id = device_id
-        self._components = {}
+        self._component_id = "main"
         self._status = {}
+        self._views = {}
+        self._components = {}
+        self._attributes = self._component("main")[1]
         self._available = True
         if data:
             self.apply_data(data)
 
+    def _component(self, component_id: str):
+        """Return the capabilities and the attributes view of a component, creating them."""
+        if (capabilities := self._status.get(component_id)) is None:
+            component_id = intern(component_id)
+            capabilities = self._status[component_id] = {}
+        if (view := self._views.get(component_id)) is None:
+            view = self._views[component_id] = ComponentAttributes(capabilities)
+            if component_id != "main":
+                component = self._components[component_id] = DeviceStatusBase(component_id)
+                component._attributes = view
+        return capabilities, view
+
     def apply_attribute_update(
         self,
         component_id: str,
@@ -30,28 +134,54 @@ class DeviceStatus_custom(DeviceStatus):
         unit: Optional[str] = None,
         data: Optional[Dict] = None,
     ):
-        super().apply_attribute_update(component_id=component_id, capability=capability, attribute=attribute, value=value, unit=unit, data=data)
-        old_status = self._status[component_id][capability][attribute]
-        if component_id not in self._status:
-            self._status[component_id] = {}
-        if capability not in self._status[component_id]:
-            self._status[component_id][capability] = {}
-        self._status[component_id][capability][attribute] = Status(value, unit or old_status.unit, data)
+        """Apply an update to a specific attribute and return True if it changed."""
+        capabilities, view = self._component(component_id)
+        if (attributes := capabilities.get(capability)) is None:
+            attributes = capabilities[intern(capability)] = {}
+        old_status = attributes.get(attribute)
+        if old_status is None:
+            attribute = intern(attribute)
+            view.invalidate()
+        changed = old_status is None or old_status.value != value or old_status.data != data
+        # preserve unit until fixed in the API
+        attributes[attribute] = Status(value, unit or (old_status or STATUS_NONE).unit, data)
+        view.touch(attribute, attributes)
+        return changed
 
 
     def apply_data(self, data: dict):
-        super().apply_data(data=data)
         """Apply the values from the given data structure."""
-        self._status.clear()
+        # The capability dicts are updated in place so that entities can keep
+        # a reference to them instead of looking them up on every read.
+        for capabilities in self._status.values():
+            for attributes in capabilities.values():
+                attributes.clear()
         for component_id, component in data["components"].items():
             #_LOGGER.error("component_id : " + str(component_id) + ", component : " + str(component))
+            capabilities, _ = self._component(component_id)
             for capa, attributes in component.items():
+                if (status := capabilities.get(capa)) is None:
+                    status = capabilities[intern(capa)] = {}
                 for attribute, value in attributes.items():
-                    if component_id not in self._status:
-                        self._status[component_id] = {}
-                    if capa not in self._status[component_id]:
-                        self._status[component_id][capa] = {}
-                    self._status[component_id][capa][attribute] = Status(value.get("value"), value.get("unit"), value.get("data"))
+                    status[intern(attribute)] = Status(value.get("value"), value.get("unit"), value.get("data"))
+        for view in self._views.values():
+            view.reset()
+
+
+    def to_data(self) -> dict:
+        """Return the status in the structure of the API, so it can be applied again."""
+        return {
+            "components": {
+                component_id: {
+                    capa: {
+                        attribute: {"value": status.value, "unit": status.unit, "data": status.data}
+                        for attribute, status in attributes.items()
+                    }
+                    for capa, attributes in capabilities.items()
+                }
+                for component_id, capabilities in self._status.items()
+            }
+        }
 
 
 class DeviceEntity_custom(DeviceEntity):
@@ -67,6 +197,54 @@ class DeviceEntity_custom(DeviceEntity):
             self._device_id = device_id
         self._status = DeviceStatus_custom(api, self._device_id)
 
+    def to_data(self) -> dict:
+        """Return the device in the structure of the API, so it can be applied again."""
+        components = [{"id": "main", "capabilities": [{"id": c} for c in self._capabilities]}]
+        for component_id, capabilities in self._components.items():
+            components.append({"id": component_id, "capabilities": [{"id": c} for c in capabilities]})
+        data = {
+            "deviceId": self._device_id,
+            "name": self._name,
+            "label": self._label,
+            "locationId": self._location_id,
+            "roomId": self._room_id,
+            "type": self._type,
+            "components": components,
+        }
+        if self._type == DEVICE_TYPE_DTH:
+            data["dth"] = {
+                "deviceTypeId": self._device_type_id,
+                "deviceTypeName": self._device_type_name,
+                "deviceNetworkType": self._device_type_network,
+            }
+        return data
+
+
+def location_to_data(location) -> dict:
+    """Return the location in the structure of the API."""
+    return {
+        "name": location.name,
+        "locationId": location.location_id,
+        "latitude": location.latitude,
+        "longitude": location.longitude,
+        "regionRadius": location.region_radius,
+        "temperatureScale": location.temperature_scale,
+        "locale": location.locale,
+        "countryCode": location.country_code,
+        "timeZoneId": location.timezone_id,
+    }
+
+
+def scene_to_data(scene) -> dict:
+    """Return the scene in the structure of the API."""
+    return {
+        "sceneColor": scene.color,
+        "sceneIcon": scene.icon,
+        "locationId": scene.location_id,
+        "sceneName": scene.name,
+        "sceneId": scene.scene_id,
+    }
+
 
 class SmartThings_custom(SmartThings):
 
@@ -78,6 +256,21 @@ class SmartThings_custom(SmartThings):
         device_ids: Optional[Sequence[str]] = None
     ) -> List:
         """Retrieve SmartThings devices."""
+        return [
+            device
+            async for device in self.iter_devices(
+                location_ids=location_ids, capabilities=capabilities, device_ids=device_ids
+            )
+        ]
+
+    async def iter_devices(
+        self,
+        *,
+        location_ids: Optional[Sequence[str]] = None,
+        capabilities: Optional[Sequence[str]] = None,
+        device_ids: Optional[Sequence[str]] = None
+    ) -> AsyncIterator[DeviceEntity_custom]:
+        """Yield the SmartThings devices as their pages arrive."""
         params = []
         if location_ids:
             params.extend([("locationId", lid) for lid in location_ids])
@@ -85,10 +278,30 @@ class SmartThings_custom(SmartThings):
             params.extend([("capability", cap) for cap in capabilities])
         if device_ids:
             params.extend([("deviceId", did) for did in device_ids])
-        resp = await self._service.get_devices(params)
-        return [DeviceEntity_custom(self._service, entity) for entity in resp]
+        # The devices are created while the next page downloads
+        async with aclosing(self._service.iter_devices(params)) as entities:
+            async for entity in entities:
+                yield DeviceEntity_custom(self._service, entity)
 
     async def device(self, device_id: str) -> DeviceEntity_custom:
         """Retrieve a device with the specified ID."""
         entity = await self._service.get_device(device_id)
         return DeviceEntity_custom(self._service, entity)
+
+    def restore_location(self, data: dict) -> LocationEntity:
+        """Create a location from previously saved data."""
+        return LocationEntity(self._service, data)
+
+    def restore_scenes(self, data: List[dict]) -> List[SceneEntity]:
+        """Create the scenes from previously saved data."""
+        return [SceneEntity(self._service, entity) for entity in data]
+
+    def restore_devices(self, data: List[dict], status: Dict[str, dict]) -> List[DeviceEntity_custom]:
+        """Create the devices and their status from previously saved data."""
+        devices = []
+        for entity in data:
+            device = DeviceEntity_custom(self._service, entity)
+            if device_status := status.get(device.device_id):
+                device.status.apply_data(device_status)
+            devices.append(device)
+        return devices
@@ -33,21 +33,22 @@ async def async_setup_entry(
 ) -> None:
     """Add fans for a config entry."""
     broker = hass.data[DOMAIN][DATA_BROKERS][config_entry.entry_id]
-    if SettingManager.enable_default_entities():
+    if broker.settings.enable_default_entities():
         async_add_entities(
             [
                 SmartThingsFan(device)
                 for device in broker.devices.values()
-                if broker.any_assigned(device.device_id, "fan") and SettingManager.allow_device(device.device_id)
+                if broker.any_assigned(device.device_id, "fan") and broker.settings.allow_device(device.device_id)
             ]
         )
 
     broker = hass.data[DOMAIN][DATA_BROKERS][config_entry.entry_id]
     entities = []
-    settings = SettingManager.get_capa_settings(broker, Platform.FAN)
-    for s in settings:
-        _LOGGER.debug("cap setting : " + str(s[1]))
-        entities.append(SmartThingsFan_custom(hass=hass, setting=s))
+    entities.extend(
+        broker.create_custom_entities(
+            Platform.FAN, async_add_entities, lambda s: SmartThingsFan_custom(hass=hass, setting=s)
+        )
+    )
 
     async_add_entities(entities)
 
@@ -109,37 +109,41 @@ class SmartThingsFan_custom(SmartThingsEntity_custom, FanEntity):
     
     # method ########################################################################################
     async def async_turn_on(self, percentage: int | None = None, preset_mode: str | None = None, **kwargs: Any) -> None:
-        await self.send_command(ATTR_SWITCH, self.get_command(ATTR_SWITCH, {STATE_ON:STATE_ON}).get(STATE_ON), self.get_argument(ATTR_SWITCH, {STATE_ON:[]}).get(STATE_ON, []))
-        if percentage:
-            value = int(math.ceil(percentage_to_ranged_value(self._speed_range, percentage)))
-            await self.send_command(ATTR_PERCENTAGE, self.get_command(ATTR_PERCENTAGE), [value])
-        if preset_mode:
-            await self.async_set_preset_mode(preset_mode)
+        async with command_batch():
+            await self.send_command(ATTR_SWITCH, self.get_command(ATTR_SWITCH, {STATE_ON:STATE_ON}).get(STATE_ON), self.get_argument(ATTR_SWITCH, {STATE_ON:[]}).get(STATE_ON, []))
+            if percentage:
+                value = int(math.ceil(percentage_to_ranged_value(self._speed_range, percentage)))
+                await self.send_command(ATTR_PERCENTAGE, self.get_command(ATTR_PERCENTAGE), [value])
+            if preset_mode:
+                await self.async_set_preset_mode(preset_mode)
 
     async def async_turn_off(self, **kwargs: Any) -> None:
         await self.send_command(ATTR_SWITCH, self.get_command(ATTR_SWITCH, {STATE_OFF: STATE_OFF}).get(STATE_OFF), self.get_argument(ATTR_SWITCH, {STATE_OFF:[]}).get(STATE_OFF, []))
 
     async def async_set_direction(self, direction: str) -> None:
-        if not self.is_on:
-            await self.async_turn_on()
-        await self.send_command(ATTR_DIRECTION, self.get_command(ATTR_DIRECTION), [direction])
+        async with command_batch():
+            if not self.is_on:
+                await self.async_turn_on()
+            await self.send_command(ATTR_DIRECTION, self.get_command(ATTR_DIRECTION), [direction])
 
     async def async_set_preset_mode(self, preset_mode: str) -> None:
-        if not self.is_on:
-            await self.async_turn_on()
-        preset_mode = self.get_mapping_key(ATTR_PRESET_MODE, CONF_MODE_MAPPING, preset_mode)
-        await self.send_command(ATTR_PRESET_MODE, self.get_command(ATTR_PRESET_MODE), [preset_mode])
+        async with command_batch():
+            if not self.is_on:
+                await self.async_turn_on()
+            preset_mode = self.get_mapping_key(ATTR_PRESET_MODE, CONF_MODE_MAPPING, preset_mode)
+            await self.send_command(ATTR_PRESET_MODE, self.get_command(ATTR_PRESET_MODE), [preset_mode])
         
     async def async_set_percentage(self, percentage: int) -> None:
         if le(percentage, 0):
             await self.async_turn_off()
             return
             
-        if not self.is_on:
-            await self.async_turn_on()
+        async with command_batch():
+            if not self.is_on:
+                await self.async_turn_on()
 
-        value = int(math.ceil(percentage_to_ranged_value(self._speed_range, percentage)))
-        await self.send_command(ATTR_PERCENTAGE, self.get_command(ATTR_PERCENTAGE), [value])
+            value = int(math.ceil(percentage_to_ranged_value(self._speed_range, percentage)))
+            await self.send_command(ATTR_PERCENTAGE, self.get_command(ATTR_PERCENTAGE), [value])
 
     async def async_oscillate(self, oscillating: bool) -> None:
         try:
@@ -2,6 +2,7 @@
 Module to assist in verifying a signed header.
 """
 import six
+from functools import lru_cache
 
 from Crypto.Hash import HMAC
 from Crypto.PublicKey import RSA
@@ -42,6 +43,15 @@ class Verifier(Signer):
             raise HttpSigException("Unsupported algorithm.")
 
 
+@lru_cache(maxsize=16)
+def get_verifier(secret, algorithm):
+    """
+    Return the Verifier of a secret, shared by the requests signed with it.
+    Importing an RSA key is expensive, this way it is only done once per key.
+    """
+    return Verifier(secret, algorithm=algorithm)
+
+
 class HeaderVerifier(Verifier):
     """
     Verifies an HTTP signature from given headers.
@@ -71,7 +81,11 @@ class HeaderVerifier(Verifier):
         self.path = path
         self.host = host
         
-        super(HeaderVerifier, self).__init__(secret, algorithm=self.auth_dict['algorithm'])
+        verifier = get_verifier(secret, self.auth_dict['algorithm'])
+        self._rsa = verifier._rsa
+        self._hash = verifier._hash
+        self.sign_algorithm = verifier.sign_algorithm
+        self.hash_algorithm = verifier.hash_algorithm
 
     def verify(self):
         """
@@ -5,7 +5,7 @@ import asyncio
 from collections.abc import Sequence
 from typing import Any
 
-from .pysmartthings import Capability
+from .pysmartthings import Capability, command_batch
 
 from homeassistant.components.light import (
     ATTR_BRIGHTNESS,
@@ -31,12 +31,12 @@ async def async_setup_entry(
 ) -> None:
     """Add lights for a config entry."""
     broker = hass.data[DOMAIN][DATA_BROKERS][config_entry.entry_id]
-    if SettingManager.enable_default_entities():
+    if broker.settings.enable_default_entities():
         async_add_entities(
             [
                 SmartThingsLight(device)
                 for device in broker.devices.values()
-                if broker.any_assigned(device.device_id, "light") and SettingManager.allow_device(device.device_id)
+                if broker.any_assigned(device.device_id, "light") and broker.settings.allow_device(device.device_id)
             ],
             True,
         )
@@ -111,24 +111,26 @@ class SmartThingsLight(SmartThingsEntity, LightEntity):
 
     async def async_turn_on(self, **kwargs: Any) -> None:
         """Turn the light on."""
-        tasks = []
-        # Color temperature
-        if ATTR_COLOR_TEMP_KELVIN in kwargs:
-            tasks.append(self.async_set_color_temp(kwargs[ATTR_COLOR_TEMP_KELVIN]))
-        # Color
-        if ATTR_HS_COLOR in kwargs:
-            tasks.append(self.async_set_color(kwargs[ATTR_HS_COLOR]))
-        if tasks:
-            # Set temp/color first
-            await asyncio.gather(*tasks)
-
-        # Switch/brightness/transition
-        if ATTR_BRIGHTNESS in kwargs:
-            await self.async_set_level(
-                kwargs[ATTR_BRIGHTNESS], kwargs.get(ATTR_TRANSITION, 0)
-            )
-        else:
-            await self._device.switch_on(set_status=True)
+        # All the commands are sent to the device in a single request
+        async with command_batch():
+            tasks = []
+            # Color temperature
+            if ATTR_COLOR_TEMP_KELVIN in kwargs:
+                tasks.append(self.async_set_color_temp(kwargs[ATTR_COLOR_TEMP_KELVIN]))
+            # Color
+            if ATTR_HS_COLOR in kwargs:
+                tasks.append(self.async_set_color(kwargs[ATTR_HS_COLOR]))
+            if tasks:
+                # Set temp/color first
+                await asyncio.gather(*tasks)
+
+            # Switch/brightness/transition
+            if ATTR_BRIGHTNESS in kwargs:
+                await self.async_set_level(
+                    kwargs[ATTR_BRIGHTNESS], kwargs.get(ATTR_TRANSITION, 0)
+                )
+            else:
+                await self._device.switch_on(set_status=True)
 
         # State is set optimistically in the commands above, therefore update
         # the entity state ahead of receiving the confirming push updates
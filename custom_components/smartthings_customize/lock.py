@@ -37,19 +37,20 @@ async def async_setup_entry(
     """Add locks for a config entry."""
     broker = hass.data[DOMAIN][DATA_BROKERS][config_entry.entry_id]
     entities = []
-    if SettingManager.enable_default_entities():
+    if broker.settings.enable_default_entities():
         async_add_entities(
             [
                 SmartThingsLock(device)
                 for device in broker.devices.values()
-                if broker.any_assigned(device.device_id, "lock") and SettingManager.allow_device(device.device_id)
+                if broker.any_assigned(device.device_id, "lock") and broker.settings.allow_device(device.device_id)
             ]
         )
 
-    settings = SettingManager.get_capa_settings(broker, Platform.LOCK)
-    for s in settings:
-        _LOGGER.debug("cap setting : " + str(s[1]))
-        entities.append(SmartThingsLock_custom(hass=hass, setting=s))
+    entities.extend(
+        broker.create_custom_entities(
+            Platform.LOCK, async_add_entities, lambda s: SmartThingsLock_custom(hass=hass, setting=s)
+        )
+    )
 
     async_add_entities(entities)
 
@@ -32,10 +32,11 @@ async def async_setup_entry(
     """Add switches for a config entry."""
     broker = hass.data[DOMAIN][DATA_BROKERS][config_entry.entry_id]
     entities = []
-    settings = SettingManager.get_capa_settings(broker, Platform.LOCK)
-    for s in settings:
-        _LOGGER.debug("cap setting : " + str(s[1]))
-        entities.append(SmartThingsLock_custom(hass=hass, setting=s))
+    entities.extend(
+        broker.create_custom_entities(
+            Platform.LOCK, async_add_entities, lambda s: SmartThingsLock_custom(hass=hass, setting=s)
+        )
+    )
 
     async_add_entities(entities)
 
@@ -0,0 +1,124 @@
+"""Poll the devices whose attributes are not pushed by SmartThings."""
+from __future__ import annotations
+
+import asyncio
+import logging
+from time import monotonic
+
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.event import async_track_time_interval
+
+from .const import (
+    POLL_MAX_INTERVAL,
+    POLL_MIN_INTERVAL,
+    POLL_TICK_INTERVAL,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class DevicePoller:
+    """Refresh the (device, capability) pairs lacking push coverage, within a request budget.
+
+    Each uncovered pair is polled from POLL_MIN_INTERVAL, and its interval
+    doubles up to POLL_MAX_INTERVAL while its capability does not change.
+    One request refreshes every pair of a device, so the budget counts
+    devices. Covered pairs are never polled. The status is merged by the
+    broker through the same path as the push events.
+    """
+
+    def __init__(self, hass: HomeAssistant, broker) -> None:
+        """Create a new poller for the devices of a broker."""
+        self._hass = hass
+        self._broker = broker
+        self._uncovered = set()
+        self._interval = {}
+        self._due = {}
+        self._allowance = 0.0
+        self._running = False
+        self._tick_remove = None
+        self.polls = 0
+        self.changes = 0
+
+    def set_coverage(self, pairs: set, uncovered: set):
+        """Set the (device id, capability) pairs read by the settings and those not pushed."""
+        for pair in uncovered - self._uncovered:
+            # Newly uncovered pairs are polled on the next tick
+            self._interval[pair] = POLL_MIN_INTERVAL
+            self._due[pair] = 0
+        for pair in self._uncovered - uncovered:
+            self._interval.pop(pair, None)
+            self._due.pop(pair, None)
+        self._uncovered = set(uncovered)
+        if uncovered:
+            _LOGGER.debug("Polling %s capabilities without push updates", len(uncovered))
+
+    def push_received(self, device_id: str, capability: str):
+        """Record a push event, an uncovered pair that got one waits for its next poll."""
+        pair = (device_id, capability)
+        if pair in self._uncovered:
+            self._due[pair] = monotonic() + self._interval.get(pair, POLL_MIN_INTERVAL)
+
+    def start(self):
+        """Start polling."""
+        if self._tick_remove is None:
+            self._tick_remove = async_track_time_interval(
+                self._hass, self._async_tick, POLL_TICK_INTERVAL
+            )
+
+    def stop(self):
+        """Stop polling."""
+        if self._tick_remove:
+            self._tick_remove()
+            self._tick_remove = None
+
+    def _due_devices(self, now: float) -> list:
+        """Return the ids of the devices with a pair to poll, most overdue first."""
+        due = {}
+        for (device_id, _), when in self._due.items():
+            if when <= now:
+                due[device_id] = min(when, due.get(device_id, when))
+        return sorted(due, key=due.get)
+
+    async def _async_tick(self, now=None):
+        """Poll the devices that are due, as far as the budget allows."""
+        if self._running or (budget := self._broker.settings.poll_budget()) <= 0:
+            return
+        self._allowance = min(
+            budget, self._allowance + budget * POLL_TICK_INTERVAL.total_seconds() / 60
+        )
+        due = self._due_devices(monotonic())[: int(self._allowance)]
+        if not due:
+            return
+        self._allowance -= len(due)
+
+        self._running = True
+        try:
+            await asyncio.gather(*(self._async_poll(device_id) for device_id in due))
+        finally:
+            self._running = False
+
+    async def _async_poll(self, device_id: str):
+        """Poll a device and schedule the next poll of its uncovered pairs."""
+        pairs = [pair for pair in self._uncovered if pair[0] == device_id]
+        if (device := self._broker.devices.get(device_id)) is None:
+            for pair in pairs:
+                self._due.pop(pair, None)
+            return
+        changed = set()
+        try:
+            data = await self._broker.async_get_device_status(device_id)
+            changed = self._broker.apply_device_status(device, data)
+        except Exception as error:  # pylint:disable=broad-except
+            _LOGGER.debug("Failed to poll device %s: %s", device_id, error)
+        self.polls += 1
+        self.changes += len(changed)
+
+        now = monotonic()
+        for pair in pairs:
+            if pair[1] in changed:
+                interval = POLL_MIN_INTERVAL
+            else:
+                interval = min(self._interval.get(pair, POLL_MIN_INTERVAL) * 2, POLL_MAX_INTERVAL)
+            self._interval[pair] = interval
+            self._due[pair] = now + interval
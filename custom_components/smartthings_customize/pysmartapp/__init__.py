@@ -7,7 +7,7 @@ from .const import __title__, __version__  # noqa
 from .dispatch import Dispatcher
 from .errors import (
     SignatureVerificationError, SmartAppNotRegisteredError)
-from .event import Event, EventRequest
+from .event import DeviceEvent, Event, EventRequest
 from .install import InstallRequest
 from .oauthcallback import OAuthCallbackRequest
 from .ping import PingRequest, PingResponse
@@ -27,6 +27,7 @@ __all__ = [
     'SignatureVerificationError',
     'SmartAppNotRegisteredError',
     # event
+    'DeviceEvent',
     'Event',
     'EventRequest',
     # install
@@ -1,52 +1,45 @@
 """Define the event module."""
 
-from typing import Any, Dict, Optional, Sequence
+from typing import Any, Dict, Iterator, NamedTuple, Optional, Sequence
 
 from .const import EVENT_TYPE_DEVICE, EVENT_TYPE_TIMER
 from .request import EmptyDataResponse, Request, Response
 
 
+class DeviceEvent(NamedTuple):
+    """Define the fields of a device event needed to update a device."""
+
+    device_id: str
+    component_id: str
+    capability: str
+    attribute: str
+    value: Optional[Any]
+    data: Optional[Dict[str, Any]]
+    location_id: str
+
+
 class Event:
-    """Define an event."""
+    """Define an event, as a view over its raw data."""
+
+    __slots__ = ['_event_type', '_device_event', '_timer_event']
 
     def __init__(self, data: dict):
         """Create a new instance of the event class."""
         self._event_type = data['eventType']
-        self._subscription_name = None
-        self._event_id = None
-        self._location_id = None
-        self._device_id = None
-        self._component_id = None
-        self._capability = None
-        self._attribute = None
-        self._value = None
-        self._value_type = None
-        self._data = None
-        self._state_change = None
-        if self._event_type == EVENT_TYPE_DEVICE:
-            device_event = data['deviceEvent']
-            self._subscription_name = device_event['subscriptionName']
-            self._event_id = device_event['eventId']
-            self._location_id = device_event['locationId']
-            self._device_id = device_event['deviceId']
-            self._component_id = device_event['componentId']
-            self._capability = device_event['capability']
-            self._attribute = device_event['attribute']
-            self._value = device_event['value']
-            self._value_type = device_event['valueType']
-            self._data = device_event.get('data')
-            self._state_change = device_event['stateChange']
-        self._timer_name = None
-        self._timer_type = None
-        self._timer_time = None
-        self._timer_expression = None
-        if self._event_type == EVENT_TYPE_TIMER:
-            timer_event = data['timerEvent']
-            self._event_id = timer_event['eventId']
-            self._timer_name = timer_event['name']
-            self._timer_type = timer_event['type']
-            self._timer_time = timer_event['time']
-            self._timer_expression = timer_event['expression']
+        self._device_event = data['deviceEvent'] \
+            if self._event_type == EVENT_TYPE_DEVICE else None
+        self._timer_event = data['timerEvent'] \
+            if self._event_type == EVENT_TYPE_TIMER else None
+
+    def _device(self, key: str):
+        if self._device_event is None:
+            return None
+        return self._device_event[key]
+
+    def _timer(self, key: str):
+        if self._timer_event is None:
+            return None
+        return self._timer_event[key]
 
     @property
     def event_type(self) -> str:
@@ -56,77 +49,81 @@ class Event:
     @property
     def subscription_name(self) -> str:
         """Get the subscription name."""
-        return self._subscription_name
+        return self._device('subscriptionName')
 
     @property
     def event_id(self) -> str:
         """Get the event id."""
-        return self._event_id
+        if self._timer_event is not None:
+            return self._timer_event['eventId']
+        return self._device('eventId')
 
     @property
     def location_id(self) -> str:
         """Get the location id."""
-        return self._location_id
+        return self._device('locationId')
 
     @property
     def device_id(self) -> str:
         """Get the device id."""
-        return self._device_id
+        return self._device('deviceId')
 
     @property
     def component_id(self) -> str:
         """Get the component id."""
-        return self._component_id
+        return self._device('componentId')
 
     @property
     def capability(self) -> str:
         """Get the capability."""
-        return self._capability
+        return self._device('capability')
 
     @property
     def attribute(self) -> str:
         """Get the attribute."""
-        return self._attribute
+        return self._device('attribute')
 
     @property
     def value(self) -> Optional[Any]:
         """Get the value."""
-        return self._value
+        return self._device('value')
 
     @property
     def value_type(self) -> str:
         """Get the type of the value."""
-        return self._value_type
+        return self._device('valueType')
 
     @property
     def data(self) -> Optional[Dict[str, Any]]:
         """Get the data associated with the event."""
-        return self._data
+        if self._device_event is None:
+            return None
+        return self._device_event.get('data')
 
     @property
     def state_change(self) -> bool:
         """Get whether this is a new state change."""
-        return self._state_change
+        return self._device('stateChange')
 
     @property
     def timer_name(self) -> str:
         """Get the name of the timer schedule."""
-        return self._timer_name
+        return self._timer('name')
 
     @property
     def timer_type(self) -> str:
         """Get the type of time."""
-        return self._timer_type
+        return self._timer('type')
 
     @property
     def timer_time(self) -> str:
         """Get the time the timer fired."""
-        return self._timer_time
+        return self._timer('time')
 
     @property
     def timer_expression(self) -> str:
         """Get the timer firing expression."""
-        return self._timer_expression
+        return self._timer('expression')
 
 
 class EventRequest(Request):
@@ -138,7 +135,8 @@ class EventRequest(Request):
         event_data = self._event_data_raw = data['eventData']
         self._auth_token = event_data['authToken']
         self._init_installed_app(event_data['installedApp'])
-        self._events = [Event(item) for item in event_data['events']]
+        # Created on first use, the broker only reads device_events()
+        self._events = None
 
     async def _process(self, app) -> Response:
         resp = EmptyDataResponse('eventData')
@@ -157,4 +155,22 @@ class EventRequest(Request):
     @property
     def events(self) -> Sequence[Event]:
         """Get the events."""
+        if self._events is None:
+            self._events = [
+                Event(item) for item in self._event_data_raw['events']]
         return self._events
+
+    def device_events(self) -> Iterator[DeviceEvent]:
+        """Iterate over the device events, without creating the Event objects."""
+        for item in self._event_data_raw['events']:
+            if item['eventType'] != EVENT_TYPE_DEVICE:
+                continue
+            event = item['deviceEvent']
+            yield DeviceEvent(
+                event['deviceId'],
+                event['componentId'],
+                event['capability'],
+                event['attribute'],
+                event['value'],
+                event.get('data'),
+                event['locationId'])
@@ -60,6 +60,12 @@ class Request:
     async def process(self, app, headers: list = None,
                       validate_signature: bool = True) -> Response:
         """Process the request with the SmartApp."""
+        self.verify(app, headers, validate_signature)
+        return await self.process_verified(app)
+
+    def verify(self, app, headers: list = None,
+               validate_signature: bool = True):
+        """Verify the signature of the request, it does not need the event loop."""
         if validate_signature and self._supports_validation:
             try:
                 verifier = HeaderVerifier(
@@ -70,6 +76,9 @@ class Request:
                 raise SignatureVerificationError from ex
             if not result:
                 raise SignatureVerificationError
+
+    async def process_verified(self, app) -> Response:
+        """Process a request which signature was already verified."""
         response = await self._process(app)
         app.dispatcher.send(self.lifecycle, self, response, app)
         return response
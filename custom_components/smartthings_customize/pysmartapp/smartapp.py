@@ -160,10 +160,20 @@ class SmartAppManager(SmartAppBase):
     async def handle_request(self, data: dict, headers: dict = None,
                              validate_signature: bool = True) -> dict:
         """Process a lifecycle event."""
+        req, smartapp = self.prepare_request(data, headers, validate_signature)
+        return await self.process_request(req, smartapp)
+
+    def prepare_request(self, data: dict, headers: dict = None,
+                        validate_signature: bool = True):
+        """Parse and verify a lifecycle event.
+
+        This does not use the event loop, so it can run in an executor.
+        Returns the request and the SmartApp that processes it.
+        """
         req = create_request(data)
         # Always process ping lifecycle events.
         if req.lifecycle == LIFECYCLE_PING:
-            resp = await req.process(self, headers, validate_signature)
+            smartapp = self
         else:
             app_id = req.settings.get(SETTINGS_APP_ID)
             if not app_id:
@@ -171,7 +181,12 @@ class SmartAppManager(SmartAppBase):
             smartapp = self._smartapps.get(app_id)
             if not smartapp:
                 raise SmartAppNotRegisteredError(req.installed_app_id)
-            resp = await req.process(smartapp, headers, validate_signature)
+        req.verify(smartapp, headers, validate_signature)
+        return req, smartapp
+
+    async def process_request(self, req, smartapp) -> dict:
+        """Process a lifecycle event prepared by prepare_request."""
+        resp = await req.process_verified(smartapp)
 
         if req.installed_app_id:
             _LOGGER.debug("%s: %s received for installed app %s.",
@@ -32,8 +32,9 @@ from .device import (
     DeviceEntity,
     DeviceStatus,
     DeviceStatusBase,
+    command_batch,
 )
-from .errors import APIErrorDetail, APIInvalidGrant, APIResponseError
+from .errors import APICommandError, APIErrorDetail, APIInvalidGrant, APIResponseError
 from .installedapp import (
     InstalledApp,
     InstalledAppEntity,
@@ -42,6 +43,7 @@ from .installedapp import (
 )
 from .location import Location, LocationEntity
 from .oauthtoken import OAuthToken
+from .ratelimit import RateLimiter, bind_rate_limiter, get_rate_limiter
 from .room import Room, RoomEntity
 from .scene import Scene, SceneEntity
 from .smartthings import SmartThings
@@ -77,7 +79,9 @@ __all__ = [
     "DeviceEntity",
     "DeviceStatus",
     "DeviceStatusBase",
+    "command_batch",
     # error
+    "APICommandError",
     "APIErrorDetail",
     "APIInvalidGrant",
     "APIResponseError",
@@ -94,6 +98,10 @@ __all__ = [
     "RoomEntity",
     # oauthtoken
     "OAuthToken",
+    # ratelimit
+    "RateLimiter",
+    "bind_rate_limiter",
+    "get_rate_limiter",
     # scene
     "Scene",
     "SceneEntity",
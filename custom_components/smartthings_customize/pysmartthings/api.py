@@ -1,10 +1,18 @@
 """Utility for invoking the SmartThings Cloud API."""
 
-from typing import Optional, Sequence
+import asyncio
+from typing import AsyncIterator, Optional, Sequence
 
 from aiohttp import BasicAuth, ClientSession
 
 from .errors import APIInvalidGrant, APIResponseError
+from .ratelimit import (
+    DEFAULT_MAX_RETRIES,
+    RateLimiter,
+    get_rate_limiter,
+    retry_delay,
+    should_retry,
+)
 
 API_OAUTH_TOKEN = "https://auth-global.api.smartthings.com/oauth/token"
 API_BASE = "https://api.smartthings.com/v1/"
@@ -36,13 +44,26 @@ class Api:
     https://smartthings.developer.samsung.com/docs/api-ref/st-api.html
     """
 
-    __slots__ = ["_session", "_token", "_api_base"]
+    __slots__ = ["_session", "_token", "_api_base", "_max_retries"]
 
-    def __init__(self, session: ClientSession, token: str, *, api_base: str = API_BASE):
+    def __init__(
+        self,
+        session: ClientSession,
+        token: str,
+        *,
+        api_base: str = API_BASE,
+        max_retries: int = DEFAULT_MAX_RETRIES,
+    ):
         """Create a new API with the given session and token."""
         self._session = session
         self._token = token
         self._api_base = api_base
+        self._max_retries = max_retries
+
+    @property
+    def rate_limiter(self) -> RateLimiter:
+        """Get the rate limiter shared by the requests made with the token."""
+        return get_rate_limiter(self._token)
 
     async def get_locations(self) -> dict:
         """
@@ -112,6 +133,10 @@ class Api:
         """
         return await self.get_items(API_DEVICES, params=params)
 
+    def iter_devices(self, params: Optional = None) -> AsyncIterator[dict]:
+        """Yield the device definitions as their pages arrive."""
+        return self.iter_items(API_DEVICES, params=params)
+
     async def get_device(self, device_id: str) -> dict:
         """
         Get as specific device.
@@ -132,19 +157,30 @@ class Api:
 
         https://smartthings.developer.samsung.com/docs/api-ref/st-api.html#operation/executeDeviceCommands
         """
+        return await self.post_device_commands(
+            device_id, [Api.format_command(component_id, capability, command, args)]
+        )
+
+    async def post_device_commands(self, device_id, commands: Sequence[dict]) -> object:
+        """
+        Execute several commands on a device in a single request.
+
+        https://smartthings.developer.samsung.com/docs/api-ref/st-api.html#operation/executeDeviceCommands
+        """
+        data = {"commands": list(commands)}
+        return await self.post(API_DEVICE_COMMAND.format(device_id=device_id), data)
+
+    @staticmethod
+    def format_command(component_id, capability, command, args=None) -> dict:
+        """Get the structure of a command sent to a device."""
         data = {
-            "commands": [
-                {
-                    "component": component_id,
-                    "capability": capability,
-                    "command": command,
-                }
-            ]
+            "component": component_id,
+            "capability": capability,
+            "command": command,
         }
         if args:
-            data["commands"][0]["arguments"] = args
-
-        return await self.post(API_DEVICE_COMMAND.format(device_id=device_id), data)
+            data["arguments"] = args
+        return data
 
     async def get_apps(self, params: Optional = None) -> dict:
         """
@@ -349,31 +385,56 @@ class Api:
     async def request(
         self, method: str, url: str, params: dict = None, data: dict = None
     ):
-        """Perform a request against the specified parameters."""
-        async with self._session.request(
-            method,
-            url,
-            params=params,
-            json=data,
-            headers={"Authorization": "Bearer " + self._token},
-        ) as resp:
-            if resp.status == 200:
-                return await resp.json()
-            if resp.status in (400, 422, 429, 500):
-                data = None
-                try:
-                    data = await resp.json()
-                except Exception:  # pylint: disable=broad-except
-                    pass
-                raise APIResponseError(
-                    resp.request_info,
-                    resp.history,
-                    status=resp.status,
-                    message=resp.reason,
-                    headers=resp.headers,
-                    data=data,
-                )
-            resp.raise_for_status()
+        """Perform a request against the specified parameters.
+
+        Throttled requests, and failed idempotent requests, are retried with
+        an exponential backoff that honours the Retry-After header.
+        """
+        limiter = self.rate_limiter
+        attempt = 0
+        while True:
+            await limiter.acquire()
+            async with self._session.request(
+                method,
+                url,
+                params=params,
+                json=data,
+                headers={"Authorization": "Bearer " + self._token},
+            ) as resp:
+                if resp.status == 200:
+                    return await resp.json()
+                if attempt >= self._max_retries or not should_retry(
+                    method, resp.status
+                ):
+                    await Api._raise_for_status(resp)
+                    return None
+                delay = retry_delay(attempt, resp.headers.get("Retry-After"))
+            attempt += 1
+            limiter.retries += 1
+            if resp.status == 429:
+                # Hold the other requests of the token as well
+                limiter.pause(delay)
+            else:
+                await asyncio.sleep(delay)
+
+    @staticmethod
+    async def _raise_for_status(resp):
+        """Raise the error of a failed response."""
+        if resp.status in (400, 422, 429, 500):
+            data = None
+            try:
+                data = await resp.json()
+            except Exception:  # pylint: disable=broad-except
+                pass
+            raise APIResponseError(
+                resp.request_info,
+                resp.history,
+                status=resp.status,
+                message=resp.reason,
+                headers=resp.headers,
+                data=data,
+            )
+        resp.raise_for_status()
 
     async def get(self, resource: str, *, params: dict = None):
         """Get a resource."""
@@ -381,14 +442,35 @@ class Api:
 
     async def get_items(self, resource: str, *, params: dict = None):
         """Perform requests for a list of items that may have pages."""
+        return [item async for item in self.iter_items(resource, params=params)]
+
+    async def iter_items(
+        self, resource: str, *, params: dict = None
+    ) -> AsyncIterator[dict]:
+        """Yield the items of a list as its pages arrive.
+
+        The next page is requested before the items of the current page are
+        yielded, so it downloads while they are processed.
+        """
         resp = await self.request("get", self._api_base + resource, params, None)
-        items = resp.get("items", [])
-        next_link = Api._get_next_link(resp)
-        while next_link:
-            resp = await self.request("get", next_link, params, None)
-            items.extend(resp.get("items", []))
-            next_link = Api._get_next_link(resp)
-        return items
+        next_page = None
+        try:
+            while True:
+                next_link = Api._get_next_link(resp)
+                next_page = (
+                    asyncio.ensure_future(self.request("get", next_link, params, None))
+                    if next_link
+                    else None
+                )
+                for item in resp.get("items", []):
+                    yield item
+                if next_page is None:
+                    return
+                resp = await next_page
+        finally:
+            # The consumer stopped early, the prefetched page is not needed
+            if next_page is not None and not next_page.done():
+                next_page.cancel()
 
     async def post(self, resource: str, data: Optional[Sequence]):
         """Perform a post request."""
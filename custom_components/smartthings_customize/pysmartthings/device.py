@@ -1,5 +1,8 @@
 """Defines a SmartThings device."""
+import asyncio
 from collections import defaultdict, namedtuple
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
 import colorsys
 import re
 from typing import Any, Dict, Mapping, Optional, Sequence, Tuple
@@ -7,6 +10,10 @@ from typing import Any, Dict, Mapping, Optional, Sequence, Tuple
 from .api import Api
 from .capability import ATTRIBUTE_OFF_VALUES, ATTRIBUTE_ON_VALUES, Attribute, Capability
 from .entity import Entity
+from .errors import APICommandError
+
+# Commands queued by command_batch, by device id
+_COMMAND_BATCH: ContextVar[Optional[dict]] = ContextVar("command_batch", default=None)
 
 DEVICE_TYPE_OCF = "OCF"
 DEVICE_TYPE_DTH = "DTH"
@@ -838,7 +845,16 @@ class DeviceEntity(Entity, Device):
         raise NotImplementedError
 
     async def command(self, component_id: str, capability, command, args=None) -> bool:
-        """Execute a command on the device."""
+        """Execute a command on the device.
+
+        Inside command_batch the command is queued and True is returned; it is
+        sent with the other commands of the device when the batch ends.
+        """
+        batch = _COMMAND_BATCH.get()
+        if batch is not None:
+            _, commands = batch.setdefault(self._device_id, (self, []))
+            commands.append(Api.format_command(component_id, capability, command, args))
+            return True
         response = await self._api.post_device_command(
             self._device_id, component_id, capability, command, args
         )
@@ -847,6 +863,19 @@ class DeviceEntity(Entity, Device):
         except (KeyError, IndexError):
             return False
 
+    async def commands(self, commands: Sequence[dict]) -> bool:
+        """Execute several commands on the device in a single request."""
+        if not commands:
+            return True
+        response = await self._api.post_device_commands(self._device_id, commands)
+        try:
+            results = response["results"]
+            return bool(results) and all(
+                result["status"] in ("ACCEPTED", "COMPLETED") for result in results
+            )
+        except (KeyError, TypeError):
+            return False
+
     async def set_color(
         self,
         hue: Optional[float] = None,
@@ -1429,3 +1458,32 @@ class DeviceEntity(Entity, Device):
     def status(self):
         """Get the status entity of the device."""
         return self._status
+
+
+@asynccontextmanager
+async def command_batch():
+    """Send the commands issued inside the block in one request per device.
+
+    Commands keep their order. Nothing is sent if the block raises. Batches
+    can be nested, the outermost one sends the commands. APICommandError is
+    raised when a device does not accept its commands, after its status was
+    read again to undo the values the commands set optimistically.
+    """
+    if _COMMAND_BATCH.get() is not None:
+        yield
+        return
+    batch = {}
+    token = _COMMAND_BATCH.set(batch)
+    try:
+        yield
+    finally:
+        _COMMAND_BATCH.reset(token)
+    results = await asyncio.gather(
+        *(device.commands(commands) for device, commands in batch.values())
+    )
+    failed = [device for (device, _), result in zip(batch.values(), results) if not result]
+    if failed:
+        await asyncio.gather(
+            *(device.status.refresh() for device in failed), return_exceptions=True
+        )
+        raise APICommandError([device.device_id for device in failed])
@@ -96,3 +96,12 @@ class APIInvalidGrant(Exception):
     """Define an invalid grant error."""
 
     pass
+
+
+class APICommandError(Exception):
+    """Define an error for commands of a batch that a device did not accept."""
+
+    def __init__(self, device_ids: Sequence[str]):
+        """Create a new instance of the command error."""
+        super().__init__(f"Commands were not accepted by {', '.join(device_ids)}")
+        self.device_ids = list(device_ids)
@@ -0,0 +1,135 @@
+"""Define the rate limiting and retry policy of the API requests."""
+
+import asyncio
+from collections import OrderedDict
+import random
+from time import monotonic
+from typing import Dict, Optional
+
+DEFAULT_RATE = 10
+DEFAULT_BURST = 20
+DEFAULT_MAX_RETRIES = 3
+DEFAULT_BACKOFF = 0.5
+DEFAULT_MAX_BACKOFF = 30
+
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+IDEMPOTENT_METHODS = ("get", "head", "put", "delete", "options")
+
+# Limiters and token bindings kept for the most recent keys and tokens
+MAX_LIMITERS = 16
+
+
+class RateLimiter:
+    """Token bucket shared by the requests made with the same token."""
+
+    __slots__ = [
+        "_rate",
+        "_burst",
+        "_tokens",
+        "_updated",
+        "_paused_until",
+        "_lock",
+        "requests",
+        "retries",
+        "throttled",
+        "waited",
+    ]
+
+    def __init__(self, rate: float = DEFAULT_RATE, burst: Optional[float] = None):
+        """Create a new limiter allowing rate requests per second, 0 for no limit."""
+        self._rate = rate
+        self._burst = burst or max(rate, 1)
+        self._tokens = self._burst
+        self._updated = monotonic()
+        self._paused_until = 0.0
+        self._lock = asyncio.Lock()
+        self.requests = 0
+        self.retries = 0
+        self.throttled = 0
+        self.waited = 0.0
+
+    async def acquire(self):
+        """Wait until a request can be sent."""
+        start = monotonic()
+        async with self._lock:
+            while True:
+                now = monotonic()
+                if now < self._paused_until:
+                    await asyncio.sleep(self._paused_until - now)
+                    continue
+                if self._rate <= 0:
+                    break
+                self._tokens = min(
+                    self._burst, self._tokens + (now - self._updated) * self._rate
+                )
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    break
+                await asyncio.sleep((1 - self._tokens) / self._rate)
+        self.requests += 1
+        self.waited += monotonic() - start
+
+    def pause(self, delay: float):
+        """Hold every request for delay seconds, after being throttled."""
+        self.throttled += 1
+        self._paused_until = max(self._paused_until, monotonic() + delay)
+
+    @property
+    def stats(self) -> Dict[str, float]:
+        """Get the counters of the limiter."""
+        return {
+            "requests": self.requests,
+            "retries": self.retries,
+            "throttled": self.throttled,
+            "waited": round(self.waited, 3),
+        }
+
+
+_LIMITERS: "OrderedDict[str, RateLimiter]" = OrderedDict()
+# Stable key of the limiter used by a token
+_TOKEN_KEYS: "OrderedDict[str, str]" = OrderedDict()
+
+
+def bind_rate_limiter(token: str, key: str):
+    """Use the limiter of a stable key for the requests made with a token.
+
+    Tokens are rotated, binding each of them to the same key keeps the
+    bucket and its counters across rotations.
+    """
+    _TOKEN_KEYS[token] = key
+    _TOKEN_KEYS.move_to_end(token)
+    if len(_TOKEN_KEYS) > MAX_LIMITERS:
+        _TOKEN_KEYS.popitem(last=False)
+
+
+def get_rate_limiter(token: str) -> RateLimiter:
+    """Get the limiter shared by the requests made with a token, or with a key."""
+    key = _TOKEN_KEYS.get(token, token)
+    limiter = _LIMITERS.get(key)
+    if limiter is None:
+        limiter = _LIMITERS[key] = RateLimiter(DEFAULT_RATE, DEFAULT_BURST)
+        if len(_LIMITERS) > MAX_LIMITERS:
+            _LIMITERS.popitem(last=False)
+    else:
+        _LIMITERS.move_to_end(key)
+    return limiter
+
+
+def should_retry(method: str, status: int) -> bool:
+    """Return True if a failed request can be sent again."""
+    if status == 429:
+        # Throttled requests were not processed
+        return True
+    return status in RETRY_STATUSES and method.lower() in IDEMPOTENT_METHODS
+
+
+def retry_delay(attempt: int, retry_after: Optional[str] = None) -> float:
+    """Get the time to wait before a retry, with full jitter, honouring Retry-After."""
+    delay = random.uniform(0, min(DEFAULT_MAX_BACKOFF, DEFAULT_BACKOFF * 2**attempt))
+    if retry_after:
+        try:
+            delay = max(delay, float(retry_after))
+        except ValueError:
+            pass
+    return delay
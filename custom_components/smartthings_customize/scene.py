@@ -15,7 +15,7 @@ async def async_setup_entry(
 ) -> None:
     """Add switches for a config entry."""
     broker = hass.data[DOMAIN][DATA_BROKERS][config_entry.entry_id]
-    if SettingManager.enable_default_entities():
+    if broker.settings.enable_default_entities():
         async_add_entities([SmartThingsScene(scene) for scene in broker.scenes.values()])
 
 
@@ -564,13 +564,13 @@ async def async_setup_entry(
     broker = hass.data[DOMAIN][DATA_BROKERS][config_entry.entry_id]
     entities: list[SensorEntity] = []
     #_LOGGER.error("devices : "+ str(broker.devices.values()))
-    if SettingManager.enable_default_entities():
+    if broker.settings.enable_default_entities():
         for device in broker.devices.values():
             #_LOGGER.error("capability : " + str(broker.get_assigned(device.device_id, "sensor")))
-            if SettingManager.allow_device(device.device_id) == False:
+            if broker.settings.allow_device(device.device_id) == False:
                 continue
             for capability in broker.get_assigned(device.device_id, Platform.SENSOR):
-                if SettingManager.ignore_capability(capability=capability): continue
+                if broker.settings.ignore_capability(capability=capability): continue
                 if capability == Capability.three_axis:
                     entities.extend(
                         [
@@ -606,7 +606,7 @@ async def async_setup_entry(
             #_LOGGER.error("ca to sensor : " + str(CAPABILITY_TO_SENSORS))
             if broker.any_assigned(device.device_id, Platform.SWITCH):
                 for capability in broker.get_assigned(device.device_id, Platform.SENSOR):
-                    if SettingManager.ignore_capability(capability=capability): continue
+                    if broker.settings.ignore_capability(capability=capability): continue
                     if capability in (Capability.energy_meter, Capability.power_meter):
                         maps = CAPABILITY_TO_SENSORS[capability]
                         entities.extend(
@@ -624,10 +624,11 @@ async def async_setup_entry(
                             ]
                         )
 
-    settings = SettingManager.get_capa_settings(broker, Platform.SENSOR)
-    for s in settings:
-        _LOGGER.debug("cap setting : " + str(s[1]))
-        entities.append(SmartThingsSensor_custom(hass=hass, setting=s))
+    entities.extend(
+        broker.create_custom_entities(
+            Platform.SENSOR, async_add_entities, lambda s: SmartThingsSensor_custom(hass=hass, setting=s)
+        )
+    )
 
     async_add_entities(entities)
 
@@ -11,6 +11,7 @@ from urllib.parse import urlparse
 from uuid import uuid4
 
 from aiohttp import web
+from http import HTTPStatus
 from .pysmartapp import Dispatcher, SmartAppManager
 from .pysmartapp.const import SETTINGS_APP_ID
 from .pysmartthings import (
@@ -32,31 +33,38 @@ from homeassistant.components import cloud, webhook
 from homeassistant.config_entries import ConfigFlowResult
 from homeassistant.const import CONF_WEBHOOK_ID
 from homeassistant.core import HomeAssistant
-from homeassistant.helpers.aiohttp_client import async_get_clientsession
 from homeassistant.helpers.dispatcher import (
     async_dispatcher_connect,
     async_dispatcher_send,
 )
 from homeassistant.helpers.network import NoURLAvailableError, get_url
 from homeassistant.helpers.storage import Store
+from homeassistant.util.json import json_loads
 
+from .custom_api import async_get_session
 from .const import (
     APP_NAME_PREFIX,
     APP_OAUTH_CLIENT_NAME,
     APP_OAUTH_SCOPES,
+    CONF_APP_INSTANCES,
     CONF_CLOUDHOOK_URL,
+    CONF_OFFLOAD_WEBHOOK,
     CONF_INSTALLED_APP_ID,
     CONF_INSTANCE_ID,
     CONF_REFRESH_TOKEN,
     DATA_BROKERS,
     DATA_MANAGER,
+    DATA_WEBHOOK_QUEUE,
     DOMAIN,
+    FIND_APP_CONCURRENCY,
     IGNORED_CAPABILITIES,
     SETTINGS_INSTANCE_ID,
     SIGNAL_SMARTAPP_PREFIX,
     STORAGE_KEY,
     STORAGE_VERSION,
     SUBSCRIPTION_WARNING_LIMIT,
+    WEBHOOK_QUEUE_SIZE,
+    WEBHOOK_WORKERS,
 )
 
 _LOGGER = logging.getLogger(__name__)
@@ -97,19 +105,58 @@ def format_unique_id(app_id: str, location_id: str) -> str:
 
 async def find_app(hass: HomeAssistant, api: SmartThings) -> AppEntity | None:
     """Find an existing SmartApp for this installation of hass."""
-    apps = await api.apps()
-    for app in [app for app in apps if app.app_name.startswith(APP_NAME_PREFIX)]:
-        # Load settings to compare instance id
-        settings = await app.settings()
-        if (
-            settings.settings.get(SETTINGS_INSTANCE_ID)
-            == hass.data[DOMAIN][CONF_INSTANCE_ID]
-        ):
-            _LOGGER.error("return app")
-            return app
-    _LOGGER.error("return None")
-    return None
+    instance_id = hass.data[DOMAIN][CONF_INSTANCE_ID]
+    store = Store[dict[str, Any]](hass, STORAGE_VERSION, STORAGE_KEY)
+    config = await store.async_load() or {}
+    known = config.get(CONF_APP_INSTANCES, {})
+
+    apps = [app for app in await api.apps() if app.app_name.startswith(APP_NAME_PREFIX)]
+    # Apps seen before are resolved without loading their settings
+    if app := next((app for app in apps if known.get(app.app_id) == instance_id), None):
+        return app
+
+    resolved = {}
+    semaphore = asyncio.Semaphore(FIND_APP_CONCURRENCY)
+
+    async def get_instance_id(app):
+        async with semaphore:
+            # Load settings to compare instance id
+            settings = await app.settings()
+        resolved[app.app_id] = settings.settings.get(SETTINGS_INSTANCE_ID)
+        return app
+
+    tasks = [
+        asyncio.create_task(get_instance_id(app)) for app in apps if app.app_id not in known
+    ]
+    found = None
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            app = await next_done
+            if resolved[app.app_id] == instance_id:
+                found = app
+                break
+    finally:
+        for task in tasks:
+            task.cancel()
+
+    if resolved:
+        if not config:
+            # Keep the store usable by setup_smartapp_endpoint
+            config = {
+                CONF_INSTANCE_ID: instance_id,
+                CONF_WEBHOOK_ID: hass.data[DOMAIN][CONF_WEBHOOK_ID],
+                CONF_CLOUDHOOK_URL: hass.data[DOMAIN].get(CONF_CLOUDHOOK_URL),
+            }
+        # Forget the apps that no longer exist
+        app_ids = {app.app_id for app in apps}
+        config[CONF_APP_INSTANCES] = {
+            app_id: value
+            for app_id, value in {**known, **resolved}.items()
+            if app_id in app_ids
+        }
+        await store.async_save(config)
 
+    return found
 
 
 async def validate_installed_app(api, installed_app_id: str):
@@ -301,6 +348,7 @@ async def setup_smartapp_endpoint(hass: HomeAssistant, fresh_install: bool):
         CONF_INSTANCE_ID: config[CONF_INSTANCE_ID],
         DATA_BROKERS: {},
         CONF_WEBHOOK_ID: config[CONF_WEBHOOK_ID],
+        DATA_WEBHOOK_QUEUE: WebhookQueue(hass),
         # Will not be present if not enabled
         CONF_CLOUDHOOK_URL: config.get(CONF_CLOUDHOOK_URL),
     }
@@ -347,22 +395,32 @@ async def smartapp_sync_subscriptions(
     location_id: str,
     installed_app_id: str,
     devices,
+    settings: SettingManager,
 ):
-    """Synchronize subscriptions of an installed up."""
-    api = SmartThings(async_get_clientsession(hass), auth_token)
+    """Synchronize subscriptions of an installed up.
+
+    Returns the (device id, capability) pairs read by the settings and the
+    pairs left without a subscription.
+    """
+    api = SmartThings(await async_get_session(hass), auth_token)
     tasks = []
 
-    async def create_subscription(target: str):
+    async def create_subscription(source_type: SourceType, target: str):
         sub = Subscription()
         sub.installed_app_id = installed_app_id
-        sub.location_id = location_id
-        sub.source_type = SourceType.CAPABILITY
-        sub.capability = target
+        sub.source_type = source_type
+        if source_type is SourceType.DEVICE:
+            sub.device_id = target
+            sub.component_id = "*"
+        else:
+            sub.location_id = location_id
+            sub.capability = target
         try:
             await api.create_subscription(sub)
             _LOGGER.debug(
                 "Created subscription for '%s' under app '%s'", target, installed_app_id
             )
+            return True
         except Exception as error:  # pylint:disable=broad-except
             _LOGGER.error(
                 "Failed to create subscription for '%s' under app '%s': %s",
@@ -370,6 +428,7 @@ async def smartapp_sync_subscriptions(
                 installed_app_id,
                 error,
             )
+            return False
 
     async def delete_subscription(sub: SubscriptionEntity):
         try:
@@ -379,13 +438,13 @@ async def smartapp_sync_subscriptions(
                     "Removed subscription for '%s' under app '%s' because it was no"
                     " longer needed"
                 ),
-                sub.capability,
+                sub.device_id if sub.source_type is SourceType.DEVICE else sub.capability,
                 installed_app_id,
             )
         except Exception as error:  # pylint:disable=broad-except
             _LOGGER.error(
                 "Failed to remove subscription for '%s' under app '%s': %s",
-                sub.capability,
+                sub.device_id if sub.source_type is SourceType.DEVICE else sub.capability,
                 installed_app_id,
                 error,
             )
@@ -394,10 +453,10 @@ async def smartapp_sync_subscriptions(
     capabilities = set()
     # merge capabilities
     extend_capa = []
-    extend_capa = SettingManager().get_capabilities()
+    extend_capa = settings.get_capabilities()
     _LOGGER.debug("extend capa : " + str(extend_capa))
     extend_capa = list(set(extend_capa))
-    if SettingManager().enable_default_entities():
+    if settings.enable_default_entities():
         _LOGGER.warning("The default entity activation feature will be removed soon. Edit your settings please")
         CAPABILITIES.extend(extend_capa)
         for device in devices:
@@ -408,46 +467,166 @@ async def smartapp_sync_subscriptions(
         # Remove unused capabilities
         capabilities.difference_update(IGNORED_CAPABILITIES)
         # Remove ignore capabilities
-        capabilities.difference_update(SettingManager().ignore_capabilities())
+        capabilities.difference_update(settings.ignore_capabilities())
     else:
         capabilities.update(extend_capa)
+    capabilities.discard(None)
+
+    pairs = settings.get_subscription_pairs(devices, capabilities)
+    if len(capabilities) > SUBSCRIPTION_WARNING_LIMIT:
+        # Only subscribe to what the settings read on the devices of the location
+        capabilities, device_ids, uncovered = plan_subscriptions(pairs)
+    else:
+        device_ids, uncovered = set(), set()
 
-    capability_count = len(capabilities)
-    if capability_count > SUBSCRIPTION_WARNING_LIMIT:
+    if uncovered:
         _LOGGER.warning(
             (
-                "Some device attributes may not receive push updates and there may be"
-                " subscription creation failures under app '%s' because %s"
-                " subscriptions are required but there is a limit of %s per app"
+                "%s device capabilities will not receive push updates under app '%s'"
+                " because there is a limit of %s subscriptions per app: %s"
             ),
+            len(uncovered),
             installed_app_id,
-            capability_count,
             SUBSCRIPTION_WARNING_LIMIT,
+            sorted(uncovered)[:10],
         )
     _LOGGER.debug(
-        "Synchronizing subscriptions for %s capabilities under app '%s': %s",
-        capability_count,
+        "Synchronizing subscriptions for %s capabilities and %s devices under app '%s': %s %s",
+        len(capabilities),
+        len(device_ids),
         installed_app_id,
         capabilities,
+        device_ids,
     )
 
+    planned = {(SourceType.CAPABILITY, c): c for c in capabilities}
+    planned.update({(SourceType.DEVICE, d): d for d in device_ids})
+    active = set(planned)
+
     # Get current subscriptions and find differences
     subscriptions = await api.subscriptions(installed_app_id)
     for subscription in subscriptions:
-        if subscription.capability in capabilities:
-            capabilities.remove(subscription.capability)
+        key = _subscription_key(subscription)
+        if key in planned:
+            del planned[key]
         else:
             # Delete the subscription
             tasks.append(delete_subscription(subscription))
 
-    # Remaining capabilities need subscriptions created
-    tasks.extend([create_subscription(c) for c in capabilities])
-
+    # Free the slots before the remaining subscriptions are created
     if tasks:
         await asyncio.gather(*tasks)
-    else:
+
+    keys = list(planned)
+    if keys:
+        results = await asyncio.gather(
+            *(create_subscription(source_type, target) for (source_type, target) in keys)
+        )
+        active.difference_update(key for key, created in zip(keys, results) if not created)
+    elif not tasks:
         _LOGGER.debug("Subscriptions for app '%s' are up-to-date", installed_app_id)
 
+    uncovered = {
+        pair
+        for pair in pairs
+        if (SourceType.CAPABILITY, pair[1]) not in active
+        and (SourceType.DEVICE, pair[0]) not in active
+    }
+    return pairs, uncovered
+
+
+def _subscription_key(subscription: SubscriptionEntity):
+    """Return the key of a subscription in the plan, None if the plan never creates it."""
+    if subscription.attribute not in (None, "*"):
+        return None
+    if subscription.source_type is SourceType.CAPABILITY:
+        return (SourceType.CAPABILITY, subscription.capability)
+    if (
+        subscription.source_type is SourceType.DEVICE
+        and subscription.capability in (None, "*")
+        and subscription.component_id in (None, "*")
+    ):
+        return (SourceType.DEVICE, subscription.device_id)
+    return None
+
+
+def plan_subscriptions(pairs: set, limit: int = SUBSCRIPTION_WARNING_LIMIT):
+    """Choose the subscriptions that cover the (device id, capability) pairs.
+
+    A capability subscription covers the capability on every device and a
+    device subscription covers every capability of the device. The smallest
+    set of subscriptions is a minimum vertex cover of the bipartite graph
+    of the pairs. When it does not fit in the limit, the subscriptions
+    covering the most pairs are kept.
+
+    Returns the capabilities, the device ids and the pairs left uncovered.
+    """
+    by_capability = {}
+    by_device = {}
+    for device_id, capability in pairs:
+        by_capability.setdefault(capability, set()).add(device_id)
+        by_device.setdefault(device_id, set()).add(capability)
+
+    if len(by_capability) <= limit:
+        return set(by_capability), set(), set()
+
+    # Maximum matching (capability -> device), by augmenting paths
+    match_device = {}
+    match_capability = {}
+
+    def augment(capability, visited) -> bool:
+        for device_id in by_capability[capability]:
+            if device_id in visited:
+                continue
+            visited.add(device_id)
+            if device_id not in match_device or augment(match_device[device_id], visited):
+                match_device[device_id] = capability
+                match_capability[capability] = device_id
+                return True
+        return False
+
+    for capability in sorted(by_capability, key=lambda c: len(by_capability[c])):
+        augment(capability, set())
+
+    # König: walk the alternating paths from the unmatched capabilities
+    reached_capabilities = {c for c in by_capability if c not in match_capability}
+    reached_devices = set()
+    stack = list(reached_capabilities)
+    while stack:
+        for device_id in by_capability[stack.pop()]:
+            if device_id in reached_devices:
+                continue
+            reached_devices.add(device_id)
+            capability = match_device.get(device_id)
+            if capability is not None and capability not in reached_capabilities:
+                reached_capabilities.add(capability)
+                stack.append(capability)
+
+    capabilities = set(by_capability) - reached_capabilities
+    device_ids = reached_devices
+    if len(capabilities) + len(device_ids) <= limit:
+        return capabilities, device_ids, set()
+
+    # Too many, keep the subscriptions that cover the most pairs
+    capabilities, device_ids = set(), set()
+    uncovered = set(pairs)
+    while uncovered and len(capabilities) + len(device_ids) < limit:
+        count_capability = {}
+        count_device = {}
+        for device_id, capability in uncovered:
+            count_capability[capability] = count_capability.get(capability, 0) + 1
+            count_device[device_id] = count_device.get(device_id, 0) + 1
+        capability = max(count_capability, key=count_capability.get)
+        device_id = max(count_device, key=count_device.get)
+        if count_capability[capability] >= count_device[device_id]:
+            capabilities.add(capability)
+            uncovered = {pair for pair in uncovered if pair[1] != capability}
+        else:
+            device_ids.add(device_id)
+            uncovered = {pair for pair in uncovered if pair[0] != device_id}
+    return capabilities, device_ids, uncovered
+
+
 async def _find_and_continue_flow(
     hass: HomeAssistant,
     app_id: str,
@@ -586,6 +765,51 @@ async def smartapp_webhook(hass: HomeAssistant, webhook_id: str, request):
     validates the signature for authenticity.
     """
     manager = hass.data[DOMAIN][DATA_MANAGER]
-    data = await request.json()
-    result = await manager.handle_request(data, request.headers)
-    return web.json_response(result)
\ No newline at end of file
+    if not any(
+        entry.options.get(CONF_OFFLOAD_WEBHOOK)
+        for entry in hass.config_entries.async_entries(DOMAIN)
+    ):
+        data = await request.json()
+        result = await manager.handle_request(data, request.headers)
+        return web.json_response(result)
+
+    body = await request.read()
+    prepared = await hass.data[DOMAIN][DATA_WEBHOOK_QUEUE].prepare(
+        manager, body, request.headers
+    )
+    if prepared is None:
+        # SmartThings sends the request again later
+        return web.Response(status=HTTPStatus.SERVICE_UNAVAILABLE)
+    result = await manager.process_request(*prepared)
+    return web.json_response(result)
+
+
+def _prepare_request(manager: SmartAppManager, body: bytes, headers):
+    """Decode and verify a webhook request, run in the executor."""
+    return manager.prepare_request(json_loads(body), headers)
+
+
+class WebhookQueue:
+    """Bounded queue of the webhook requests decoded and verified in the executor."""
+
+    def __init__(self, hass: HomeAssistant) -> None:
+        """Create a new queue."""
+        self._hass = hass
+        self._workers = asyncio.Semaphore(WEBHOOK_WORKERS)
+        self._pending = 0
+        self.rejected = 0
+
+    async def prepare(self, manager: SmartAppManager, body: bytes, headers):
+        """Return the request and its SmartApp, None when the queue is full."""
+        if self._pending >= WEBHOOK_QUEUE_SIZE:
+            self.rejected += 1
+            _LOGGER.debug("Webhook queue is full, %s requests rejected", self.rejected)
+            return None
+        self._pending += 1
+        try:
+            async with self._workers:
+                return await self._hass.async_add_executor_job(
+                    _prepare_request, manager, body, headers
+                )
+        finally:
+            self._pending -= 1
@@ -31,17 +31,18 @@ async def async_setup_entry(
     broker = hass.data[DOMAIN][DATA_BROKERS][config_entry.entry_id]
     entities = []
 
-    if SettingManager.enable_default_entities():
+    if broker.settings.enable_default_entities():
         for device in broker.devices.values():
-            if SettingManager.allow_device(device.device_id) == False:
+            if broker.settings.allow_device(device.device_id) == False:
                 continue
             if broker.any_assigned(device.device_id, Platform.SWITCH):
                 entities.append(SmartThingsSwitch(device))
 
-    settings = SettingManager.get_capa_settings(broker, Platform.SWITCH)
-    for s in settings:
-        _LOGGER.debug("cap setting : " + str(s[1]))
-        entities.append(SmartThingsSwitch_custom(hass=hass, setting=s))
+    entities.extend(
+        broker.create_custom_entities(
+            Platform.SWITCH, async_add_entities, lambda s: SmartThingsSwitch_custom(hass=hass, setting=s)
+        )
+    )
 
     async_add_entities(entities)
 
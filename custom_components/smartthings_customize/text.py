@@ -26,10 +26,11 @@ async def async_setup_entry(
     broker = hass.data[DOMAIN][DATA_BROKERS][config_entry.entry_id]
 
     entities = []
-    settings = SettingManager.get_capa_settings(broker, Platform.TEXT)
-    for s in settings:
-        _LOGGER.debug("cap setting : " + str(s[1]))
-        entities.append(SmartThingsText_custom(hass=hass, setting=s))
+    entities.extend(
+        broker.create_custom_entities(
+            Platform.TEXT, async_add_entities, lambda s: SmartThingsText_custom(hass=hass, setting=s)
+        )
+    )
 
     async_add_entities(entities)
 
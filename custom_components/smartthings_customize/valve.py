@@ -29,10 +29,11 @@ async def async_setup_entry(
     broker = hass.data[DOMAIN][DATA_BROKERS][config_entry.entry_id]
     entities = []
 
-    settings = SettingManager.get_capa_settings(broker, Platform.VALVE)
-    for s in settings:
-    
-        entities.append(SmartThingsValve_custom(hass=hass, setting=s))
+    entities.extend(
+        broker.create_custom_entities(
+            Platform.VALVE, async_add_entities, lambda s: SmartThingsValve_custom(hass=hass, setting=s)
+        )
+    )
 
     async_add_entities(entities)
 
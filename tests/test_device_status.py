@@ -0,0 +1,91 @@
+"""Tests of the attributes view of the device status against the upstream status."""
+import pytest
+
+pytest.importorskip("homeassistant")
+pytest.importorskip("aiohttp")
+
+from custom_components.smartthings_customize.device import DeviceStatus_custom  # noqa: E402
+from custom_components.smartthings_customize.pysmartthings.device import (  # noqa: E402
+    STATUS_NONE,
+    DeviceStatus,
+    Status,
+)
+
+DATA = {
+    "components": {
+        "main": {
+            "switch": {"switch": {"value": "on"}},
+            "switchLevel": {"level": {"value": 50, "unit": "%"}},
+            # Two capabilities sharing an attribute name
+            "custom.a": {"mode": {"value": "a"}},
+            "custom.b": {"mode": {"value": "b"}},
+        },
+        "sub": {
+            "temperatureMeasurement": {"temperature": {"value": 21, "unit": "C"}},
+        },
+    }
+}
+
+
+@pytest.fixture
+def statuses():
+    return DeviceStatus(None, "device", DATA), DeviceStatus_custom(None, "device", DATA)
+
+
+def test_get(statuses):
+    upstream, custom = statuses
+    for attribute, status in upstream.attributes.items():
+        assert custom.attributes[attribute] == status
+    assert custom.attributes["mode"].value == "b"
+    assert custom.attributes["missing"] == STATUS_NONE
+    assert custom.attributes.get("missing") is None
+    assert (
+        custom.components["sub"].attributes["temperature"]
+        == upstream.components["sub"].attributes["temperature"]
+    )
+
+
+def test_iteration(statuses):
+    upstream, custom = statuses
+    assert set(custom.attributes) == set(upstream.attributes)
+    assert len(custom.attributes) == len(upstream.attributes)
+    assert "level" in custom.attributes
+    assert "temperature" not in custom.attributes
+
+
+def test_last_update_wins(statuses):
+    upstream, custom = statuses
+    for status in statuses:
+        status.apply_attribute_update("main", "custom.a", "mode", "x")
+    assert custom.attributes["mode"] == upstream.attributes["mode"]
+    assert custom.attributes["mode"].value == "x"
+
+    for status in statuses:
+        status.apply_attribute_update("main", "custom.b", "mode", "y")
+    assert custom.attributes["mode"].value == "y"
+
+    # A full load goes back to the order of the capabilities
+    custom.apply_data(DATA)
+    assert custom.attributes["mode"].value == "b"
+
+
+def test_set(statuses):
+    upstream, custom = statuses
+    for status in statuses:
+        status.attributes["level"] = Status(70, "%", None)
+        status.attributes["extra"] = Status(1, None, None)
+    assert custom.attributes["level"] == upstream.attributes["level"]
+    assert custom._status["main"]["switchLevel"]["level"].value == 70
+    assert custom.attributes["extra"] == upstream.attributes["extra"]
+    assert set(custom.attributes) == set(upstream.attributes)
+
+
+def test_del(statuses):
+    upstream, custom = statuses
+    for status in statuses:
+        del status.attributes["mode"]
+    assert "mode" not in custom.attributes
+    assert custom.attributes["mode"] == STATUS_NONE
+    assert set(custom.attributes) == set(upstream.attributes) - {"mode"}
+    with pytest.raises(KeyError):
+        del custom.attributes["missing"]
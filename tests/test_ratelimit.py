@@ -0,0 +1,105 @@
+"""Tests of the rate limiter shared by the API requests."""
+import asyncio
+import importlib.util
+from types import SimpleNamespace
+
+import pytest
+
+from conftest import ROOT
+
+# The module has no dependencies, it is loaded on its own so the tests run
+# without Home Assistant and aiohttp
+_spec = importlib.util.spec_from_file_location(
+    "ratelimit",
+    ROOT / "custom_components" / "smartthings_customize" / "pysmartthings" / "ratelimit.py",
+)
+ratelimit = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(ratelimit)
+
+
+class FakeClock:
+    """Monotonic clock that only moves when the limiter sleeps."""
+
+    def __init__(self):
+        self.now = 0.0
+        self.slept = 0.0
+
+    def monotonic(self):
+        return self.now
+
+    async def sleep(self, delay):
+        self.now += delay
+        self.slept += delay
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(ratelimit, "monotonic", clock.monotonic)
+    monkeypatch.setattr(ratelimit, "asyncio", SimpleNamespace(sleep=clock.sleep, Lock=asyncio.Lock))
+    return clock
+
+
+def acquire(limiter, count):
+    async def run():
+        for _ in range(count):
+            await limiter.acquire()
+
+    asyncio.run(run())
+
+
+def test_burst(clock):
+    limiter = ratelimit.RateLimiter(10, 20)
+    acquire(limiter, 20)
+    assert clock.slept == 0
+    acquire(limiter, 1)
+    assert clock.slept == pytest.approx(0.1)
+    assert limiter.requests == 21
+
+
+def test_refill(clock):
+    limiter = ratelimit.RateLimiter(10, 20)
+    acquire(limiter, 20)
+    clock.now += 1
+    acquire(limiter, 10)
+    assert clock.slept == 0
+    # The bucket never holds more than the burst
+    clock.now += 60
+    acquire(limiter, 21)
+    assert clock.slept == pytest.approx(0.1)
+
+
+def test_pause_after_throttling(clock):
+    limiter = ratelimit.RateLimiter(10, 20)
+    limiter.pause(5)
+    acquire(limiter, 1)
+    assert clock.slept == pytest.approx(5)
+    assert limiter.throttled == 1
+
+
+def test_no_limit(clock):
+    limiter = ratelimit.RateLimiter(0)
+    acquire(limiter, 100)
+    assert clock.slept == 0
+
+
+def test_shared_limiter():
+    limiter = ratelimit.get_rate_limiter("token-1")
+    assert limiter is ratelimit.get_rate_limiter("token-1")
+    assert limiter._burst == ratelimit.DEFAULT_BURST
+
+    # Rotated tokens bound to the same key keep the same limiter
+    ratelimit.bind_rate_limiter("token-2", "installed-app")
+    ratelimit.bind_rate_limiter("token-3", "installed-app")
+    limiter = ratelimit.get_rate_limiter("installed-app")
+    assert ratelimit.get_rate_limiter("token-2") is limiter
+    assert ratelimit.get_rate_limiter("token-3") is limiter
+
+
+def test_retry_policy():
+    assert ratelimit.should_retry("post", 429)
+    assert ratelimit.should_retry("get", 503)
+    assert not ratelimit.should_retry("post", 503)
+    assert not ratelimit.should_retry("get", 404)
+    assert ratelimit.retry_delay(0, "7") >= 7
+    assert ratelimit.retry_delay(10, "invalid") <= ratelimit.DEFAULT_MAX_BACKOFF
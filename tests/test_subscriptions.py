@@ -0,0 +1,55 @@
+"""Tests of the subscription planner."""
+import pytest
+
+pytest.importorskip("homeassistant")
+
+from custom_components.smartthings_customize.smartapp import plan_subscriptions  # noqa: E402
+
+
+def covered(pairs, capabilities, device_ids):
+    return {pair for pair in pairs if pair[1] in capabilities or pair[0] in device_ids}
+
+
+def test_capabilities_within_limit():
+    pairs = {("d1", "switch"), ("d2", "switch"), ("d2", "battery"), ("d3", "contactSensor")}
+
+    capabilities, device_ids, uncovered = plan_subscriptions(pairs, limit=3)
+
+    assert capabilities == {"switch", "battery", "contactSensor"}
+    assert device_ids == set()
+    assert uncovered == set()
+
+
+def test_minimum_cover_within_limit():
+    # Every device shares switch and has two capabilities of its own,
+    # the five devices cover all the pairs
+    pairs = {(f"d{i}", "switch") for i in range(5)}
+    pairs |= {(f"d{i}", f"c{i}{n}") for i in range(5) for n in range(2)}
+
+    capabilities, device_ids, uncovered = plan_subscriptions(pairs, limit=6)
+
+    assert len(capabilities) + len(device_ids) == 5
+    assert covered(pairs, capabilities, device_ids) == pairs
+    assert uncovered == set()
+
+
+def test_mixed_cover_is_minimum():
+    # switch on every device, plus one device with many capabilities
+    pairs = {(f"d{i}", "switch") for i in range(10)}
+    pairs |= {("hub", f"c{n}") for n in range(10)}
+
+    capabilities, device_ids, uncovered = plan_subscriptions(pairs, limit=3)
+
+    assert capabilities == {"switch"}
+    assert device_ids == {"hub"}
+    assert uncovered == set()
+
+
+def test_uncovered_reported_over_limit():
+    pairs = {(f"d{i}", f"c{i}{n}") for i in range(10) for n in range(2)}
+
+    capabilities, device_ids, uncovered = plan_subscriptions(pairs, limit=4)
+
+    assert len(capabilities) + len(device_ids) <= 4
+    assert uncovered
+    assert uncovered == pairs - covered(pairs, capabilities, device_ids)